@@ -70,6 +70,8 @@ INSTALLED_APPS = [
     "webpack_loader",
     "django_extensions",
     "django_select2",
+    "django_tasks",
+    "django_tasks.backends.database",
     # Local apps
     "core",
     "home",
@@ -220,6 +222,13 @@ STORAGES = {
     "staticfiles": {
         "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
     },
+    # Files which must not be served, e.g. the uploaded import files.
+    "private": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {
+            "location": os.path.join(BASE_DIR, "private"),
+        },
+    },
 }
 
 # Django sets a maximum of 1000 fields per form by default, but particularly complex page models
@@ -343,6 +352,25 @@ CACHES = {
         "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
         "LOCATION": os.path.join(BASE_DIR, "cache"),
     },
+    # Required: version stamps and precomputed values, kept apart so that the
+    # culling of the default cache can not drop them. A lost version stamp
+    # invalidates everything cached under it. Size it for all the pages and
+    # languages, or point it to Redis or Memcached in production.
+    "persistent": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(BASE_DIR, "cache", "persistent"),
+        "TIMEOUT": None,
+        "OPTIONS": {
+            "MAX_ENTRIES": 200_000,
+        },
+    },
+}
+
+# Background tasks, run with `python manage.py db_worker`.
+TASKS = {
+    "default": {
+        "BACKEND": "django_tasks.backends.database.DatabaseBackend",
+    },
 }
 
 AUTHENTICATION_BACKENDS = [
@@ -7,3 +7,5 @@ class BlogConfig(AppConfig):
 
     def ready(self):
         from . import jsonld_builders  # noqa: F401
+        from . import renditions  # noqa: F401
+        from . import signals  # noqa: F401
@@ -0,0 +1,15 @@
+from core.renditions import register_renditions
+
+# Renditions rendered by blog/includes/post-item.html.
+POST_IMAGE_FILTERS = [
+    "width-720|format-avif",
+    "width-720|format-webp",
+    "width-720|format-jpeg",
+]
+
+register_renditions(
+    "blog-post-images",
+    "blog.BlogPostPage",
+    "image",
+    POST_IMAGE_FILTERS,
+)
@@ -1,5 +1,5 @@
 from blog.models import BlogCategoryPage, BlogIndexPage, BlogPostPage, BlogTag
-from core.utils import paginate
+from core.utils import CURSOR_KEYS, cursor_paginate, get_count_key, paginate
 
 
 def get_blog_index_page_service(context):
@@ -27,7 +27,10 @@ def get_paginated_blog_posts_service(context, parent, count=16):
 
     qs = qs.filter(**filters)
 
-    return paginate(request, qs, count)
+    if "after" in request.GET:
+        return cursor_paginate(request, qs, count)
+    count_key = get_count_key(parent, "blog", sorted(filters.items()))
+    return paginate(request, qs, count, count_key=count_key, keys=CURSOR_KEYS)
 
 
 def _build_tree(pages, parent):
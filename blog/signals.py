@@ -0,0 +1,27 @@
+from django.dispatch import receiver
+from wagtail.models import PageLogEntry
+from wagtail.signals import page_published
+
+from blog.models import BlogPostPage
+from core.renditions import enqueue_renditions
+
+
+def get_previous_published_image_id(page, revision) -> int | None:
+    """Return the image id of the revision published before this one."""
+    content = (
+        PageLogEntry.objects.filter(
+            page=page, action="wagtail.publish", revision__isnull=False
+        )
+        .exclude(revision=revision)
+        .order_by("-timestamp", "-pk")
+        .values_list("revision__content", flat=True)
+        .first()
+    )
+    return content.get("image") if content else None
+
+
+@receiver(page_published, sender=BlogPostPage)
+def warm_post_image_renditions(sender, instance, revision=None, **kwargs):
+    # Drafts are not rendered, and a published image has its renditions.
+    if instance.image_id != get_previous_published_image_id(instance, revision):
+        enqueue_renditions("blog-post-images", [instance.image_id])
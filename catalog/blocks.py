@@ -10,6 +10,20 @@ class OrganizationBlock(PageChooserBlock):
             page_type = "catalog.Organization"
         super().__init__(page_type, can_choose_root, target_model, **kwargs)
 
+    def get_context(self, value, parent_context=None):
+        from catalog.services import get_organization_card_service
+
+        context = super().get_context(value, parent_context=parent_context)
+        # Sections load the cards of all their blocks at once.
+        cards = (parent_context or {}).get("organization_cards") or {}
+        if value is None:
+            context["card"] = None
+        elif value.pk in cards:
+            context["card"] = cards[value.pk]
+        else:
+            context["card"] = get_organization_card_service(value)
+        return context
+
     class Meta:  # type: ignore
         icon = "briefcase-solid"
         label = _("Organization")
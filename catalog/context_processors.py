@@ -1,14 +1,20 @@
-from functools import lru_cache
+from django.utils.translation import get_language
+
+from core.cache import context_cache
 
 from .models import City
 
 
-@lru_cache()
-def popular_cities(_):
+def get_popular_cities():
     try:
-        popular_cities = City.objects.live().filter(
-            popular=True).order_by("title")[:20]
+        return list(City.objects.live().filter(popular=True).order_by("title")[:20])
     except Exception:
-        popular_cities = []
+        return []
+
 
+def popular_cities(request):
+    # The order of the titles depends on the language.
+    popular_cities = context_cache.get(
+        ("popular_cities", get_language()), get_popular_cities
+    )
     return {"popular_cities": popular_cities}
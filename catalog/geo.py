@@ -0,0 +1,204 @@
+import math
+
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+GEOHASH_PRECISION = 9
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+EARTH_RADIUS_KM = 6371.0088
+
+# Most geohash prefixes a bounding box query is split into.
+MAX_BBOX_CELLS = 16
+
+
+def parse_ll(value: str | None) -> tuple[float, float] | None:
+    """
+    Parse the "latitude, longitude" text of an ll field.
+
+    Commas, semicolons and spaces are accepted as separators. Returns None
+    for empty, malformed or out of range values.
+    """
+    if not value:
+        return None
+    cleaned = value.replace(";", ",").strip()
+    if "," in cleaned:
+        parts = [p.strip() for p in cleaned.split(",") if p.strip()]
+    else:
+        parts = cleaned.split()
+    if len(parts) < 2:
+        return None
+    try:
+        lat, lon = float(parts[0]), float(parts[1])
+    except ValueError:
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+
+def encode_geohash(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Return the geohash of the point."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        value, bounds = (lon, lon_range) if even else (lat, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            bounds[0] = mid
+        else:
+            bounds[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def geohash_bounds(geohash: str) -> tuple[float, float, float, float]:
+    """Return the (south, west, north, east) bounds of the geohash cell."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+
+    for char in geohash:
+        bits = GEOHASH_ALPHABET.index(char)
+        for shift in range(4, -1, -1):
+            bounds = lon_range if even else lat_range
+            mid = (bounds[0] + bounds[1]) / 2
+            if bits >> shift & 1:
+                bounds[0] = mid
+            else:
+                bounds[1] = mid
+            even = not even
+
+    return lat_range[0], lon_range[0], lat_range[1], lon_range[1]
+
+
+def cell_size(precision: int) -> tuple[float, float]:
+    """Return the height and width in degrees of a geohash cell."""
+    bits = precision * 5
+    lon_bits = (bits + 1) // 2
+    lat_bits = bits // 2
+    return 180.0 / 2**lat_bits, 360.0 / 2**lon_bits
+
+
+def snap_bbox(
+    south: float, west: float, north: float, east: float, precision: int
+) -> tuple[float, float, float, float]:
+    """Expand the bounding box to the edges of the geohash cells at the precision."""
+    height, width = cell_size(precision)
+    return (
+        max(math.floor((south + 90) / height) * height - 90, -90.0),
+        max(math.floor((west + 180) / width) * width - 180, -180.0),
+        min(math.ceil((north + 90) / height) * height - 90, 90.0),
+        min(math.ceil((east + 180) / width) * width - 180, 180.0),
+    )
+
+
+def bbox_cell_count(
+    south: float, west: float, north: float, east: float, precision: int
+) -> int:
+    """Return the number of geohash cells at the precision the box touches."""
+    if west > east:
+        return bbox_cell_count(south, west, north, 180.0, precision) + (
+            bbox_cell_count(south, -180.0, north, east, precision)
+        )
+    height, width = cell_size(precision)
+    rows = math.floor((north + 90) / height) - math.floor((south + 90) / height)
+    cols = math.floor((east + 180) / width) - math.floor((west + 180) / width)
+    return (rows + 1) * (cols + 1)
+
+
+def bbox_geohashes(
+    south: float,
+    west: float,
+    north: float,
+    east: float,
+    max_cells: int = MAX_BBOX_CELLS,
+) -> list[str]:
+    """
+    Return the geohash prefixes whose cells cover the bounding box.
+
+    The longest prefixes which need at most max_cells cells are used, so a
+    geohash__startswith filter on them runs as a few index range scans.
+    """
+    south, north = max(south, -90.0), min(north, 90.0)
+    if west > east:
+        # The box crosses the antimeridian.
+        return bbox_geohashes(south, west, north, 180.0, max_cells) + bbox_geohashes(
+            south, -180.0, north, east, max_cells
+        )
+
+    cells = [""]
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        if bbox_cell_count(south, west, north, east, precision) > max_cells:
+            break
+
+        height, width = cell_size(precision)
+        cells = []
+        lat = math.floor((south + 90) / height) * height - 90
+        while lat <= north:
+            lon = math.floor((west + 180) / width) * width - 180
+            while lon <= east:
+                center_lat = min(lat + height / 2, 90.0)
+                center_lon = min(lon + width / 2, 180.0)
+                cells.append(encode_geohash(center_lat, center_lon, precision))
+                lon += width
+            lat += height
+
+    return sorted(set(cells))
+
+
+def radius_bbox(
+    lat: float, lon: float, radius_km: float
+) -> tuple[float, float, float, float]:
+    """Return the (south, west, north, east) box around a circle."""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(lat))
+    if cos_lat < 1e-9 or abs(lat) + dlat >= 90:
+        return max(lat - dlat, -90.0), -180.0, min(lat + dlat, 90.0), 180.0
+    dlon = min(math.degrees(radius_km / EARTH_RADIUS_KM / cos_lat), 180.0)
+    west, east = lon - dlon, lon + dlon
+    if west < -180:
+        west += 360
+    if east > 180:
+        east -= 360
+    return lat - dlat, west, lat + dlat, east
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Return the great-circle distance between two points in km."""
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = (
+        math.sin(dlat / 2) ** 2
+        + math.cos(math.radians(lat1))
+        * math.cos(math.radians(lat2))
+        * math.sin(dlon / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def distance_expression(lat: float, lon: float):
+    """Return the haversine distance in km from the point as an expression."""
+    lat1 = Radians(Value(lat, output_field=FloatField()))
+    lon1 = Radians(Value(lon, output_field=FloatField()))
+    lat2 = Radians(F("latitude"))
+    lon2 = Radians(F("longitude"))
+
+    a = Power(Sin((lat2 - lat1) / 2), 2) + Cos(lat1) * Cos(lat2) * Power(
+        Sin((lon2 - lon1) / 2), 2
+    )
+    # Rounding may push the root a bit above 1, out of the asin domain.
+    root = Least(Sqrt(a), Value(1.0, output_field=FloatField()))
+    return Value(2 * EARTH_RADIUS_KM, output_field=FloatField()) * ASin(root)
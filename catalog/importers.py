@@ -0,0 +1,725 @@
+import csv
+import json
+from itertools import batched
+
+from django.conf import settings
+from django.db import transaction
+from wagtail.blocks import StreamValue
+from wagtail.models import Page
+
+from catalog.models import Language, Organization, OrganizationType, ServiceType
+from catalog.search import defer_search_index
+from catalog.services import defer_presentation
+from catalog.utils import build_day_blocks, make_identity_key, parse_working_hours
+from core.cache import bump_tree_versions, suppress_tree_versions
+
+IMPORT_CHUNK_SIZE = 200
+
+TRUE_VALUES = [True, "true", "True", 1, "yes", "on", "Yes", "On"]
+
+AVAILABLE_FIELDS = [
+    "slug",
+    "tin",
+    "legal_name",
+    "external_id",
+    "plus_code",
+    "working_hours",
+    "verified",
+    "temporarily_closed",
+    "languages",
+    "ll",
+    "show_on_map",
+    "located_in",
+    "service_types",
+    "phones",
+    "social_networks",
+    "website_links",
+]
+
+I18N_AVAILABLE_FIELDS = [
+    "title",
+    "h1_title",
+    "seo_title",
+    "search_description",
+    "description",
+    "address",
+    "how_to_arrive",
+]
+
+
+class ImportRowError(Exception):
+    """Raised when an imported row can not be applied to an organization."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def get_available_fields() -> list[str]:
+    """Return the importable fields including the localized ones."""
+    fields = list(AVAILABLE_FIELDS)
+
+    for field in I18N_AVAILABLE_FIELDS:
+        for locale in settings.MODELTRANSLATION_LANGUAGES:
+            fields.append(f"{field}_{locale}")
+
+    return fields + I18N_AVAILABLE_FIELDS
+
+
+def build_working_hours(value) -> list[dict]:
+    """Convert {"Monday": "9:00 AM–6:00 PM", ...} into DayBlock stream data.
+
+    A JSON string is accepted too, broken feed JSON is repaired the same way
+    as by parse_working_hours.
+    """
+    if isinstance(value, dict):
+        wh = value
+    else:
+        try:
+            wh = parse_working_hours(value)
+        except ValueError:
+            raise ImportRowError("Invalid working hours format")
+
+    try:
+        return build_day_blocks(wh)
+    except ValueError as e:
+        raise ImportRowError(str(e))
+
+
+def apply_fields(organization: Organization, data: dict) -> None:
+    """Set the plain (non-relational) imported fields on the organization."""
+    available_fields = get_available_fields()
+
+    for field in data.keys():
+        if field not in available_fields:
+            continue
+
+        # Get field type, ex: 'CharField', 'BooleanField', etc.
+        field_type = organization._meta.get_field(field).get_internal_type()
+
+        if field_type == "CharField":
+            setattr(organization, field, data[field])
+        elif field_type == "SlugField":
+            slug = data[field].strip()
+            if slug:
+                setattr(organization, field, slug)
+        elif (
+            field_type == "TextField"
+            and "search" not in field
+            and "website" not in field
+            and "social" not in field
+        ):
+            # Make paragraphs from text
+            text = data[field].split("\n\n")
+            text = "<p>" + "</p><p>".join(text) + "</p>"
+            setattr(organization, field, text)
+        elif field_type == "TextField":
+            setattr(organization, field, data[field])
+        elif field_type == "BooleanField":
+            setattr(organization, field, data[field] in TRUE_VALUES)
+        elif field == "working_hours":
+            if data[field]:
+                organization.working_hours = build_working_hours(data[field])
+        elif field == "located_in":
+            located_in = data.get(field, "")
+            if located_in:
+                try:
+                    organization.located_in = Organization.objects.plain().get(
+                        id=int(located_in)
+                    )
+                except (ValueError, Organization.DoesNotExist):
+                    raise ImportRowError("Invalid located_in ID")
+
+
+def normalize_name(name: str) -> str:
+    """Return a casefolded name with collapsed whitespace for lookups."""
+    return " ".join(name.split()).casefold()
+
+
+def split_names(value: str) -> list[str]:
+    """Split a comma separated list of names, skipping the empty ones."""
+    return [name.strip() for name in (value or "").split(",") if name.strip()]
+
+
+class ImportResolver:
+    """Resolve service type and language names from maps loaded once.
+
+    Service types are matched by their name in every translated locale.
+    Parent pages and existing identity keys are cached as well. Create one
+    resolver per batch and reuse it for all of its rows.
+    """
+
+    def __init__(self):
+        self.service_types = {}
+        for service_type in ServiceType.objects.order_by("pk"):  # type: ignore
+            for locale in settings.MODELTRANSLATION_LANGUAGES:
+                name = getattr(service_type, f"name_{locale}", None)
+                if name:
+                    self.service_types.setdefault(normalize_name(name), service_type)
+
+        self.languages = {
+            normalize_name(language.language_name): language
+            for language in Language.objects.order_by("pk")
+        }
+
+        self.parents = {}
+        # Identity keys known to exist, loaded for the current chunk only.
+        self.identity_keys = None
+
+    def get_parent(self, parent_id) -> OrganizationType:
+        """Return the organization type with the ID, cached for the batch."""
+        try:
+            parent_id = int(parent_id)
+        except (TypeError, ValueError):
+            raise ImportRowError("Invalid parent ID")
+
+        if parent_id not in self.parents:
+            self.parents[parent_id] = OrganizationType.objects.filter(
+                id=parent_id
+            ).first()
+
+        if self.parents[parent_id] is None:
+            raise ImportRowError("Invalid parent ID")
+
+        return self.parents[parent_id]
+
+    def load_identity_keys(self, rows) -> None:
+        """Fetch the existing identity keys of a chunk of rows in one query."""
+        keys = set()
+        for row in rows:
+            if row is None:
+                continue
+            try:
+                parent = self.get_parent(row.get("parent_id"))
+            except ImportRowError:
+                continue
+            keys.add(get_identity_key(row, parent))
+
+        keys.discard("")
+        self.identity_keys = set(
+            Organization.objects.plain()
+            .filter(identity_key__in=keys)
+            .values_list("identity_key", flat=True)
+        )
+
+    def identity_key_exists(self, key: str) -> bool:
+        if self.identity_keys is None:
+            return Organization.objects.plain().filter(identity_key=key).exists()
+        return key in self.identity_keys
+
+    def add_identity_key(self, key: str) -> None:
+        if self.identity_keys is not None and key:
+            self.identity_keys.add(key)
+
+    def resolve_service_types(self, value: str) -> tuple[list, list[str]]:
+        """Return the service types found and the unknown names."""
+        return self._resolve(self.service_types, value)
+
+    def resolve_languages(self, value: str) -> tuple[list, list[str]]:
+        """Return the languages found and the unknown names."""
+        return self._resolve(self.languages, value)
+
+    def _resolve(self, lookup: dict, value: str) -> tuple[list, list[str]]:
+        found = []
+        unknown = []
+        for name in split_names(value):
+            obj = lookup.get(normalize_name(name))
+            if obj is None:
+                unknown.append(name)
+            elif obj not in found:
+                found.append(obj)
+        return found, unknown
+
+
+def apply_relations(
+    organization: Organization, data: dict, resolver: ImportResolver
+) -> list[str]:
+    """Set the service types and languages of the organization.
+
+    Return warnings about the names which could not be resolved.
+    """
+    warnings = []
+
+    if "service_types" in data:
+        sts, unknown = resolver.resolve_service_types(data["service_types"])
+        warnings += [f"Unknown service type: {name}" for name in unknown]
+        if sts:
+            organization.service_types.set(sts)
+
+    if "languages" in data:
+        langs, unknown = resolver.resolve_languages(data["languages"])
+        warnings += [f"Unknown language: {name}" for name in unknown]
+        if langs:
+            organization.languages.set(langs)
+
+    return warnings
+
+
+def get_field_value(organization: Organization, name: str):
+    """Return a comparable value of an imported field of the organization."""
+    value = organization._meta.get_field(name).value_from_object(organization)
+
+    if isinstance(value, StreamValue):
+        # Block IDs differ between revisions, compare the normalized values.
+        return [
+            (child.block_type, child.block.get_prep_value(child.value))
+            for child in value
+        ]
+
+    return value
+
+
+def get_relation_values(organization: Organization) -> dict:
+    """Return the IDs of the service types and languages of the organization."""
+    return {
+        "service_types": {obj.pk for obj in organization.service_types.all()},
+        "languages": {obj.pk for obj in organization.languages.all()},
+    }
+
+
+def apply_changes(
+    organization: Organization, data: dict, resolver: ImportResolver
+) -> tuple[list[str], list[str]]:
+    """Apply an imported row to an existing organization in memory.
+
+    Return the names of the fields whose values changed and the warnings
+    about unresolved names.
+    """
+    available_fields = get_available_fields()
+    fields = [
+        field
+        for field in data.keys()
+        if field in available_fields and field not in ("service_types", "languages")
+    ]
+
+    before = {field: get_field_value(organization, field) for field in fields}
+    relations_before = get_relation_values(organization)
+
+    apply_fields(organization, data)
+    warnings = apply_relations(organization, data, resolver)
+
+    changed = [
+        field
+        for field in fields
+        if get_field_value(organization, field) != before[field]
+    ]
+    relations_after = get_relation_values(organization)
+    changed += [
+        field
+        for field in ("service_types", "languages")
+        if relations_after[field] != relations_before[field]
+    ]
+
+    return changed, warnings
+
+
+def get_identity_key(data: dict, parent: OrganizationType) -> str:
+    """Return the identity key an imported row would get under the parent."""
+    return make_identity_key(
+        parent.path, data.get("legal_name", ""), data.get("address_en", "")
+    )
+
+
+def check_new_organization(
+    data: dict, parent: OrganizationType, resolver: ImportResolver
+) -> None:
+    """Check the required fields and that the organization does not exist yet."""
+    legal_name = data.get("legal_name", "").strip()
+    address = data.get("address_en", "").strip()
+
+    if not legal_name:
+        raise ImportRowError("Legal name is required")
+    if not address:
+        raise ImportRowError("AddressEn is required")
+
+    if resolver.identity_key_exists(get_identity_key(data, parent)):
+        raise ImportRowError("Already exists!")
+
+
+def build_organization(
+    data: dict, resolver: ImportResolver
+) -> tuple[OrganizationType, Organization, list[str]]:
+    """Check a new row and build its unsaved organization with relations."""
+    parent = resolver.get_parent(data.get("parent_id"))
+    check_new_organization(data, parent, resolver)
+
+    organization = Organization()
+    apply_fields(organization, data)
+    warnings = apply_relations(organization, data, resolver)
+
+    return parent, organization, warnings
+
+
+def prepare_organization(
+    data: dict, resolver: ImportResolver
+) -> tuple[OrganizationType, Organization, list[str]]:
+    """Validate a new row and build its unsaved organization with relations.
+
+    Nothing is written to the database.
+    """
+    parent, organization, warnings = build_organization(data, resolver)
+
+    # Rows later in the batch are duplicates even before this one is saved.
+    resolver.add_identity_key(get_identity_key(data, parent))
+
+    return parent, organization, warnings
+
+
+def bulk_add_organizations(
+    parent: OrganizationType, organizations: list[Organization]
+) -> list[Exception | None]:
+    """Insert and publish unsaved organizations as children of the parent.
+
+    The tree paths of all organizations are allocated at once under a lock
+    on the parent instead of by add_child, which locks and scans the parent
+    for every page. Each page is still saved and published with a single
+    revision. numchild of the parent is fixed, the tree versions are bumped
+    and the presentation values are queued once for the batch.
+
+    Return the exception of every organization which failed, or None.
+    """
+    errors = []
+    published = []
+
+    # The receivers would bump the tree versions and queue the presentation
+    # values once per page, they are done once for the batch instead.
+    with suppress_tree_versions(), defer_presentation(), transaction.atomic():
+        parent = OrganizationType.objects.select_for_update().get(pk=parent.pk)
+        last_child = parent.get_last_child()
+        position = Page._str2int(last_child.path[-Page.steplen :]) if last_child else 0
+        depth = parent.depth + 1
+
+        for organization in organizations:
+            position += 1
+            organization.path = Page._get_path(parent.path, depth, position)
+            organization.depth = depth
+            organization.numchild = 0
+            organization.locale_id = parent.locale_id
+            # Saves the parent lookup of treebeard and of the url_path.
+            organization._cached_parent_obj = parent
+
+            try:
+                with transaction.atomic():
+                    organization.save()
+                    organization.save_revision(changed=False, clean=False).publish()
+            except Exception as e:
+                errors.append(e)
+                continue
+
+            errors.append(None)
+            published.append(organization)
+
+        Page.objects.filter(pk=parent.pk).update(numchild=parent.get_children().count())
+
+    if published:
+        # Nothing is cached under the paths of the new pages yet.
+        bump_tree_versions(parent.path)
+
+    return errors
+
+
+def create_organization(
+    data: dict, resolver: ImportResolver | None = None, dry_run: bool = False
+) -> tuple[Organization, dict]:
+    """Create and publish a new organization from an imported row.
+
+    Return the organization and a result with the warnings about unresolved
+    names. With dry_run the row is only validated and nothing is written.
+    """
+    parent, organization, warnings = prepare_organization(
+        data, resolver or ImportResolver()
+    )
+
+    if not dry_run:
+        error = bulk_add_organizations(parent, [organization])[0]
+        if error:
+            raise error
+
+    return organization, {"action": "created", "warnings": warnings}
+
+
+def publish_changes(
+    organization: Organization,
+    data: dict,
+    resolver: ImportResolver,
+    dry_run: bool = False,
+) -> dict:
+    """Apply a row to an existing organization and publish it if it changed.
+
+    Unchanged organizations get no new revision. With dry_run the changes
+    are only reported. Return the result of the row.
+    """
+    changed, warnings = apply_changes(organization, data, resolver)
+
+    if changed and not dry_run:
+        organization.save_revision().publish()
+
+    return {
+        "action": "updated" if changed else "skipped",
+        "changed": changed,
+        "warnings": warnings,
+    }
+
+
+def update_organization(
+    data: dict, resolver: ImportResolver | None = None, dry_run: bool = False
+) -> tuple[Organization, dict]:
+    """Update and publish an existing organization from an imported row.
+
+    Return the organization and a result with the action taken, the changed
+    fields and the warnings about unresolved names.
+    """
+    id = data.get("id")
+    if not id:
+        raise ImportRowError("ID is required")
+
+    try:
+        organization = Organization.objects.plain().get(id=id)
+    except (ValueError, Organization.DoesNotExist):
+        raise ImportRowError("Organization not found", status=404)
+
+    info = publish_changes(organization, data, resolver or ImportResolver(), dry_run)
+
+    return organization, info
+
+
+def find_organization(data: dict, resolver: ImportResolver) -> Organization | None:
+    """Return the organization with the external ID of the row, or its TIN.
+
+    Organizations created before external IDs were imported have none, so a
+    missed external ID falls back to the TIN and then to the identity key,
+    among the organizations without an external ID. The row then stores its
+    external ID on the matched organization.
+    """
+    external_id = str(data.get("external_id") or "").strip()
+    tin = str(data.get("tin") or "").strip()
+    if not external_id and not tin:
+        raise ImportRowError("External ID or TIN is required")
+
+    queryset = Organization.objects.plain()
+    if external_id:
+        organization = queryset.filter(external_id=external_id).first()
+        if organization:
+            return organization
+        queryset = queryset.filter(external_id="")
+
+    if tin:
+        organizations = list(queryset.filter(tin=tin)[:2])
+        if len(organizations) > 1:
+            raise ImportRowError("TIN matches several organizations")
+        if organizations:
+            return organizations[0]
+
+    if data.get("parent_id"):
+        key = get_identity_key(data, resolver.get_parent(data.get("parent_id")))
+        if key:
+            return queryset.filter(identity_key=key).first()
+
+    return None
+
+
+def upsert_organization(
+    data: dict, resolver: ImportResolver | None = None, dry_run: bool = False
+) -> tuple[Organization, dict]:
+    """Create, update or skip an organization keyed by external ID or TIN.
+
+    Return the organization and a result with the action taken, the changed
+    fields and the warnings about unresolved names.
+    """
+    resolver = resolver or ImportResolver()
+
+    organization = find_organization(data, resolver)
+    if organization is None:
+        return create_organization(data, resolver, dry_run)
+
+    return organization, publish_changes(organization, data, resolver, dry_run)
+
+
+def iter_rows(lines, format: str = "ndjson"):
+    """Yield (line number, row) pairs from NDJSON or CSV lines.
+
+    Rows which can not be decoded are yielded as None so that the caller can
+    report them without stopping the import.
+    """
+    lines = (
+        line.decode("utf-8") if isinstance(line, bytes) else line for line in lines
+    )
+
+    if format == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            row = None
+
+        yield number, row if isinstance(row, dict) else None
+
+
+def error_result(number: int, error: Exception) -> dict:
+    """Return the result of a row which failed with the error."""
+    if isinstance(error, ImportRowError):
+        return {"row": number, "success": False, "message": error.message}
+    return {"row": number, "success": False, "message": str(error)}
+
+
+def success_result(number: int, organization: Organization, info: dict) -> dict:
+    """Return the result of a row which was applied."""
+    return {"row": number, "success": True, "id": organization.pk, **info}
+
+
+def import_row(
+    number: int,
+    row: dict | None,
+    handler=create_organization,
+    resolver: ImportResolver | None = None,
+    dry_run: bool = False,
+) -> dict:
+    """Apply a single row with the handler and return its result."""
+    if row is None:
+        return {"row": number, "success": False, "message": "Invalid JSON"}
+
+    try:
+        with transaction.atomic():
+            organization, info = handler(row, resolver, dry_run)
+    except Exception as e:
+        return error_result(number, e)
+
+    return success_result(number, organization, info)
+
+
+def create_chunk(chunk, resolver: ImportResolver, dry_run: bool = False) -> list[dict]:
+    """Create the organizations of a chunk with one bulk insert per parent."""
+    results = {}
+    groups = {}
+
+    resolver.load_identity_keys(row for _, row in chunk)
+
+    for number, row in chunk:
+        if row is None:
+            results[number] = {
+                "row": number,
+                "success": False,
+                "message": "Invalid JSON",
+            }
+            continue
+
+        try:
+            parent, organization, warnings = prepare_organization(row, resolver)
+        except Exception as e:
+            results[number] = error_result(number, e)
+            continue
+
+        groups.setdefault(parent.pk, (parent, []))[1].append(
+            (number, organization, warnings)
+        )
+
+    for parent, items in groups.values():
+        if dry_run:
+            errors = [None] * len(items)
+        else:
+            errors = bulk_add_organizations(parent, [item[1] for item in items])
+        for (number, organization, warnings), error in zip(items, errors):
+            if error:
+                results[number] = error_result(number, error)
+            else:
+                results[number] = success_result(
+                    number, organization, {"action": "created", "warnings": warnings}
+                )
+
+    return [results[number] for number, _ in chunk]
+
+
+def validate_row(number: int, row: dict | None, resolver: ImportResolver) -> dict:
+    """Validate a new row without writing and return its result.
+
+    Successful results carry the identity key of the row for the duplicate
+    check of mark_duplicates.
+    """
+    if row is None:
+        return {"row": number, "success": False, "message": "Invalid JSON"}
+
+    try:
+        parent, _, warnings = build_organization(row, resolver)
+    except Exception as e:
+        return error_result(number, e)
+
+    return {
+        "row": number,
+        "success": True,
+        "identity_key": get_identity_key(row, parent),
+        "warnings": warnings,
+    }
+
+
+def validate_rows(rows, chunk_size: int = IMPORT_CHUNK_SIZE, resolver=None):
+    """Validate new rows in chunks, yielding row results.
+
+    Existing organizations are looked up once per chunk. Duplicates within
+    the rows are not detected here, see mark_duplicates.
+    """
+    resolver = resolver or ImportResolver()
+
+    for chunk in batched(rows, chunk_size):
+        resolver.load_identity_keys(row for _, row in chunk)
+        for number, row in chunk:
+            yield validate_row(number, row, resolver)
+
+
+def mark_duplicates(results):
+    """Fail the validated rows which duplicate an earlier row of the file.
+
+    Results must come in row order. The identity keys are removed.
+    """
+    seen = {}
+
+    for result in results:
+        key = result.pop("identity_key", "")
+        if key and key in seen:
+            result = {
+                "row": result["row"],
+                "success": False,
+                "message": f"Duplicate of row {seen[key]}",
+            }
+        elif key:
+            seen[key] = result["row"]
+        yield result
+
+
+def import_rows(
+    rows,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    handler=create_organization,
+    dry_run: bool = False,
+):
+    """Apply rows in chunks, one transaction per chunk, yielding row results.
+
+    New organizations are inserted with one bulk tree insert per parent and
+    chunk. Names are resolved with a single resolver for the whole batch.
+    Results of a chunk are yielded only after the chunk has been committed.
+    With dry_run the rows are validated and diffed but nothing is written.
+    """
+    resolver = ImportResolver()
+
+    for chunk in batched(rows, chunk_size):
+        # The search index is updated in one bulk call per chunk.
+        with defer_search_index(), transaction.atomic():
+            if handler is create_organization:
+                results = create_chunk(chunk, resolver, dry_run)
+            else:
+                if handler is upsert_organization:
+                    resolver.load_identity_keys(row for _, row in chunk)
+                results = [
+                    import_row(number, row, handler, resolver, dry_run)
+                    for number, row in chunk
+                ]
+        yield from results
@@ -84,19 +84,6 @@ def _safe_decimal(value: Any) -> str | None:
         return None
 
 
-def _parse_ll(ll: str) -> tuple[str | None, str | None]:
-    if not ll:
-        return None, None
-    cleaned = ll.replace(";", ",").replace("  ", " ").strip()
-    if "," in cleaned:
-        parts = [p.strip() for p in cleaned.split(",") if p.strip()]
-    else:
-        parts = [p.strip() for p in cleaned.split(" ") if p.strip()]
-    if len(parts) < 2:
-        return None, None
-    return parts[0], parts[1]
-
-
 def format_time(value):
     """Return time in 00:00 format."""
     if isinstance(value, time):
@@ -203,10 +190,13 @@ def _(page: Organization, request):
         }
 
     # Geo
-    lat, lon = _parse_ll(page.ll)
     geo = None
-    if lat and lon and page.show_on_map:
-        geo = {"@type": "GeoCoordinates", "latitude": lat, "longitude": lon}
+    if page.latitude is not None and page.show_on_map:
+        geo = {
+            "@type": "GeoCoordinates",
+            "latitude": page.latitude,
+            "longitude": page.longitude,
+        }
 
     # Parent organization relation (if nested)
     parent_org = None
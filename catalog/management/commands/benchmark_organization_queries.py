@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from catalog.models import Organization
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the query plans and timings of the ranked and the plain "
+        "organization querysets for counts, exists checks and lookups."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Number of times each query is run for the timing.",
+        )
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="Run EXPLAIN ANALYZE (PostgreSQL only).",
+        )
+
+    def handle(self, *args, **options):
+        repeat = max(options["repeat"], 1)
+        explain_options = {}
+        if options["analyze"] and connection.vendor == "postgresql":
+            explain_options["analyze"] = True
+
+        organization = Organization.objects.plain().live().first()
+
+        cases = [
+            ("count", lambda qs: qs.live(), lambda qs: qs.count()),
+            ("exists", lambda qs: qs.live(), lambda qs: qs.exists()),
+            (
+                "located_in",
+                lambda qs: qs.filter(located_in=organization),
+                lambda qs: list(qs),
+            ),
+            ("first page", lambda qs: qs.live()[:20], lambda qs: list(qs)),
+        ]
+
+        for name, build, run in cases:
+            for label, queryset in [
+                ("ranked", Organization.objects.all()),
+                ("plain", Organization.objects.plain()),
+            ]:
+                queryset = build(queryset)
+
+                self.stdout.write(self.style.MIGRATE_HEADING(f"{name} ({label})"))
+                # count() and exists() drop the ordering of the queryset.
+                if name in ("count", "exists"):
+                    self.stdout.write(queryset.order_by().explain(**explain_options))
+                else:
+                    self.stdout.write(queryset.explain(**explain_options))
+
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    run(queryset.all())
+                elapsed = (time.perf_counter() - start) / repeat * 1000
+
+                self.stdout.write(f"{elapsed:.2f} ms per query\n")
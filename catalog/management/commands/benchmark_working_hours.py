@@ -0,0 +1,114 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.utils import build_day_blocks, get_open_close_time, parse_day_hours
+
+SAMPLE_HOURS = [
+    "9:00 AM–6:00 PM",
+    "10 AM–8 PM",
+    "8:30 AM–5:30 PM",
+    "9 AM–1 PM",
+    "11 AM–11 PM",
+    "12–9 PM",
+    "7 AM–3 PM",
+    "Open 24 hours",
+    "Closed",
+]
+
+DAYS = [
+    "Monday",
+    "Tuesday",
+    "Wednesday",
+    "Thursday",
+    "Friday",
+    "Saturday",
+    "Sunday",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures how many working_hours rows per second are converted into "
+        "DayBlock data, with and without the memo cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            nargs="?",
+            help=(
+                "NDJSON file with a working_hours field per row. "
+                "Random rows are generated by default."
+            ),
+        )
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=10000,
+            help="Number of generated rows.",
+        )
+
+    def handle(self, *args, **options):
+        if options["path"]:
+            rows = self.read_rows(options["path"])
+        else:
+            rows = [
+                {day: random.choice(SAMPLE_HOURS) for day in DAYS}
+                for _ in range(max(options["rows"], 1))
+            ]
+
+        self.stdout.write(f"Rows: {len(rows)}")
+
+        self.report("uncached", rows, self.parse_uncached)
+
+        parse_day_hours.cache_clear()
+        self.report("cached (cold)", rows, build_day_blocks)
+        self.report("cached (warm)", rows, build_day_blocks)
+
+        info = parse_day_hours.cache_info()
+        self.stdout.write(
+            f"Cache: {info.currsize} distinct strings, "
+            f"{info.hits} hits, {info.misses} misses"
+        )
+
+    def read_rows(self, path: str) -> list[dict]:
+        rows = []
+        try:
+            with open(path, encoding="utf-8") as file:
+                for line in file:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    wh = json.loads(line).get("working_hours")
+                    if isinstance(wh, str):
+                        wh = json.loads(wh)
+                    if isinstance(wh, dict):
+                        rows.append(wh)
+        except (OSError, json.JSONDecodeError) as e:
+            raise CommandError(str(e))
+        return rows
+
+    def parse_uncached(self, working_hours: dict):
+        # The per-day work of the importer before the memo cache.
+        for hours in working_hours.values():
+            hours = str(hours)
+            if hours.strip().lower() not in ("closed", "open 24 hours"):
+                get_open_close_time(hours)
+
+    def report(self, label: str, rows: list[dict], parse):
+        failed = 0
+        start = time.perf_counter()
+        for row in rows:
+            try:
+                parse(row)
+            except ValueError:
+                failed += 1
+        elapsed = time.perf_counter() - start
+
+        rate = len(rows) / elapsed if elapsed else float("inf")
+        self.stdout.write(
+            f"{label}: {elapsed:.3f}s, {rate:,.0f} rows/sec, failed: {failed}"
+        )
@@ -0,0 +1,86 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import translation
+
+from catalog.importers import (
+    IMPORT_CHUNK_SIZE,
+    create_organization,
+    import_rows,
+    iter_rows,
+    upsert_organization,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports organizations from an NDJSON or CSV file in chunks. "
+        "Prints one JSON result line per row."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path to the .ndjson/.jsonl or .csv file.")
+        parser.add_argument(
+            "--format",
+            choices=["ndjson", "csv"],
+            help="File format. Detected from the file extension by default.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=IMPORT_CHUNK_SIZE,
+            help="Number of rows committed in one transaction.",
+        )
+        parser.add_argument(
+            "--upsert",
+            action="store_true",
+            help=(
+                "Create missing organizations and update changed ones, "
+                "matched by external_id or TIN. Identical ones are skipped."
+            ),
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate the rows and report the changes without writing.",
+        )
+        parser.add_argument(
+            "--errors-only",
+            action="store_true",
+            help="Print only the rows which failed.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        format = options.get("format") or (
+            "csv" if path.lower().endswith(".csv") else "ndjson"
+        )
+        chunk_size = max(int(options.get("chunk_size") or IMPORT_CHUNK_SIZE), 1)
+        handler = upsert_organization if options["upsert"] else create_organization
+
+        try:
+            file = open(path, "rb")
+        except OSError as e:
+            raise CommandError(str(e))
+
+        processed = 0
+        failed = 0
+        actions = {}
+
+        # The admin import page posts to the English URLs.
+        with file, translation.override("en"):
+            for result in import_rows(
+                iter_rows(file, format), chunk_size, handler, options["dry_run"]
+            ):
+                processed += 1
+                if not result["success"]:
+                    failed += 1
+                else:
+                    action = result["action"]
+                    actions[action] = actions.get(action, 0) + 1
+                    if options["errors_only"]:
+                        continue
+                self.stdout.write(json.dumps(result, ensure_ascii=False))
+
+        summary = "".join(f", {action}: {count}" for action, count in actions.items())
+        self.stderr.write(f"Processed: {processed}{summary}, failed: {failed}")
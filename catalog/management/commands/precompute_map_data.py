@@ -0,0 +1,46 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import translation
+
+from catalog.models import OrganizationType
+from catalog.services import get_map_data_service, refresh_map_cells
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds the map data of every organization type and language into the "
+        "cache, optionally writes it to static JSON files, and rebuilds the "
+        "map cells of the clusters."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            help=(
+                "Directory for the <language>/<organization type id>.json "
+                "files. Only the cache is filled by default."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        output = Path(options["output"]) if options["output"] else None
+        languages = settings.MODELTRANSLATION_LANGUAGES
+
+        for org_type in OrganizationType.objects.live():
+            for language in languages:
+                with translation.override(language):
+                    data = get_map_data_service(org_type)
+
+                if output:
+                    path = output / language / f"{org_type.pk}.json"
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    path.write_text(data["content"], encoding="utf-8")
+
+            cells = refresh_map_cells(org_type)
+            self.stdout.write(
+                f"{org_type.title}: {len(languages)} languages, {cells} map cells"
+            )
+
+        self.stdout.write(self.style.SUCCESS("Done"))
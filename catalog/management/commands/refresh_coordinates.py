@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from catalog.models import City, Organization
+
+
+class Command(BaseCommand):
+    help = (
+        "Fills the latitude, longitude and geohash columns of all cities and "
+        "organizations from their ll fields."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of pages updated in one query.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(options["batch_size"], 1)
+
+        updated = City.refresh_coordinates(City.objects.all(), batch_size)
+        self.stdout.write(f"Cities: {updated} updated")
+
+        updated = Organization.refresh_coordinates(
+            Organization.objects.plain(), batch_size
+        )
+        self.stdout.write(f"Organizations: {updated} updated")
+
+        self.stdout.write(self.style.SUCCESS("Done"))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from catalog.models import Organization
+
+
+class Command(BaseCommand):
+    help = (
+        "Compiles the working hours of all organizations into opening "
+        "schedules and the intervals of the open now filter."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of organizations updated in one query.",
+        )
+
+    def handle(self, *args, **options):
+        updated = Organization.refresh_opening_schedules(
+            Organization.objects.plain(), batch_size=max(options["batch_size"], 1)
+        )
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} opening schedules"))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from catalog.models import Organization
+
+
+class Command(BaseCommand):
+    help = "Computes the listing rank keys and parent paths of all organizations."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of organizations updated in one query.",
+        )
+
+    def handle(self, *args, **options):
+        updated = Organization.refresh_rank_keys(
+            Organization.objects.plain(), batch_size=max(options["batch_size"], 1)
+        )
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} rank keys"))
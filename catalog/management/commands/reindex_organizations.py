@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from catalog.search import REINDEX_BATCH_SIZE, reindex_queued
+
+
+class Command(BaseCommand):
+    help = (
+        "Updates the search index of the organizations queued by bulk imports "
+        "only, instead of rebuilding the whole index."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=REINDEX_BATCH_SIZE,
+            help="Number of organizations indexed at once.",
+        )
+
+    def handle(self, *args, **options):
+        count = reindex_queued(max(options["batch_size"], 1))
+        self.stdout.write(self.style.SUCCESS(f"Reindexed {count} organizations"))
@@ -0,0 +1,144 @@
+import json
+import multiprocessing as mp
+from collections import deque
+from itertools import batched
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+SHARD_SIZE = 1000
+
+# Resolver of the worker process, its name maps are loaded once per process.
+_resolver = None
+
+
+def _init_worker():
+    # Django must be set up in a spawned process before the models are imported.
+    import django
+
+    django.setup()
+
+
+def _validate_shard(args: tuple[list, int]) -> list[dict]:
+    """
+    Validate a shard of (line number, row) pairs in a worker process.
+    Nothing is written to the database.
+    """
+    shard, chunk_size = args
+
+    from django.utils import translation
+
+    from catalog.importers import ImportResolver, validate_rows
+
+    global _resolver
+    if _resolver is None:
+        close_old_connections()
+        _resolver = ImportResolver()
+
+    # The admin import page posts to the English URLs.
+    with translation.override("en"):
+        return list(validate_rows(shard, chunk_size, _resolver))
+
+
+def _imap_bounded(pool, func, iterable, size: int):
+    """
+    Like pool.imap, but with at most size tasks in flight.
+
+    imap reads the whole iterable ahead of the workers, so a big file would
+    be held in memory at once. The results are yielded in order.
+    """
+    pending = deque()
+    for item in iterable:
+        pending.append(pool.apply_async(func, (item,)))
+        if len(pending) >= size:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+class Command(BaseCommand):
+    help = (
+        "Validates an NDJSON or CSV file of new organizations without writing "
+        "to the database: required fields, parent, working hours, located_in "
+        "and duplicates. Prints one JSON result line per row."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path to the .ndjson/.jsonl or .csv file.")
+        parser.add_argument(
+            "--format",
+            choices=["ndjson", "csv"],
+            help="File format. Detected from the file extension by default.",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=mp.cpu_count(),
+            help="Number of worker processes (1 = no pool).",
+        )
+        parser.add_argument(
+            "--shard-size",
+            type=int,
+            default=SHARD_SIZE,
+            help="Number of rows sent to a worker at once.",
+        )
+        parser.add_argument(
+            "--errors-only",
+            action="store_true",
+            help="Print only the rows which failed.",
+        )
+
+    def handle(self, *args, **options):
+        # Imported here, spawned workers import this module before Django is set up.
+        from catalog.importers import IMPORT_CHUNK_SIZE, iter_rows, mark_duplicates
+
+        path = options["path"]
+        format = options.get("format") or (
+            "csv" if path.lower().endswith(".csv") else "ndjson"
+        )
+        processes = max(int(options.get("processes") or 1), 1)
+        shard_size = max(int(options.get("shard_size") or SHARD_SIZE), 1)
+
+        try:
+            file = open(path, "rb")
+        except OSError as e:
+            raise CommandError(str(e))
+
+        processed = 0
+        failed = 0
+
+        with file:
+            work = (
+                (list(shard), IMPORT_CHUNK_SIZE)
+                for shard in batched(iter_rows(file, format), shard_size)
+            )
+
+            if processes == 1:
+                shards = map(_validate_shard, work)
+                results = mark_duplicates(r for shard in shards for r in shard)
+                processed, failed = self.report(results, options["errors_only"])
+            else:
+                ctx = mp.get_context("spawn")
+                with ctx.Pool(processes=processes, initializer=_init_worker) as pool:
+                    # The shards stay in file order for the duplicate check.
+                    shards = _imap_bounded(pool, _validate_shard, work, processes * 2)
+                    results = mark_duplicates(r for shard in shards for r in shard)
+                    processed, failed = self.report(results, options["errors_only"])
+
+        self.stderr.write(
+            f"Processed: {processed}, valid: {processed - failed}, failed: {failed}"
+        )
+
+    def report(self, results, errors_only: bool) -> tuple[int, int]:
+        processed = 0
+        failed = 0
+
+        for result in results:
+            processed += 1
+            if not result["success"]:
+                failed += 1
+            elif errors_only:
+                continue
+            self.stdout.write(json.dumps(result, ensure_ascii=False))
+
+        return processed, failed
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.1 on 2026-10-17 11:05
+
+import hashlib
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+PUNCTUATION_RE = re.compile(r"[^\w\s]|_")
+
+
+# Frozen copies of catalog.utils as of this migration, later changes of the
+# helpers must not change what the migration writes.
+def normalize_identity_part(value):
+    value = unicodedata.normalize("NFKC", value or "").casefold()
+    value = PUNCTUATION_RE.sub(" ", value)
+    return " ".join(value.split())
+
+
+def make_identity_key(parent_path, legal_name, address):
+    legal_name = normalize_identity_part(legal_name)
+    address = normalize_identity_part(address)
+    if not legal_name or not address:
+        return ""
+
+    raw = "\n".join([parent_path, legal_name, address])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def fill_identity_keys(apps, schema_editor):
+    # The duplicate check of the import only sees organizations with a key.
+    Organization = apps.get_model("catalog", "Organization")
+    changed = []
+
+    for organization in Organization.objects.order_by("pk").iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        # Wagtail pages use treebeard paths with steps of 4 characters.
+        organization.identity_key = make_identity_key(
+            organization.path[:-4],
+            organization.legal_name,
+            organization.address_en or "",
+        )
+        changed.append(organization)
+
+        if len(changed) >= BATCH_SIZE:
+            Organization.objects.bulk_update(changed, ["identity_key"])
+            changed = []
+
+    if changed:
+        Organization.objects.bulk_update(changed, ["identity_key"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0006_importjob_importjoberror"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="organization",
+            name="identity_key",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=40
+            ),
+        ),
+        migrations.RunPython(fill_identity_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.1 on 2026-10-17 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0007_organization_identity_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="organization",
+            name="external_id",
+            field=models.CharField(
+                blank=True, db_index=True, max_length=255, verbose_name="External ID"
+            ),
+        ),
+    ]
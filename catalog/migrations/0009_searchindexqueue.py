@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-17 13:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0008_organization_external_id"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchIndexQueue",
+            fields=[
+                (
+                    "organization",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="+",
+                        serialize=False,
+                        to="catalog.organization",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Search index queue item",
+                "verbose_name_plural": "Search index queue",
+            },
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.1 on 2026-10-17 14:30
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+BATCH_SIZE = 1000
+
+
+# Frozen copy of catalog.utils.make_rank_key as of this migration, later
+# changes of the helper must not change what the migration writes.
+def make_rank_key(
+    is_open, subscription_level, rating_weight, rating_score, has_images, published_at
+):
+    level = 0 if subscription_level is None else subscription_level + 1
+    timestamp = int(published_at.timestamp()) if published_at else 0
+
+    key = int(bool(is_open))
+    key = (key << 3) | min(max(level, 0), 7)
+    key = (key << 8) | min(max(int(rating_weight or 0), 0), 255)
+    key = (key << 10) | min(max(int((rating_score or 0) * 100), 0), 1023)
+    key = (key << 1) | int(bool(has_images))
+    key = (key << 34) | min(max(timestamp, 0), 2**34 - 1)
+    return key
+
+
+def fill_rank_keys(apps, schema_editor):
+    # The listings filter on parent_path, so existing organizations must get
+    # it before they show up again.
+    Organization = apps.get_model("catalog", "Organization")
+    OrganizationImage = apps.get_model("catalog", "OrganizationImage")
+    PremiumSubscription = apps.get_model("subscription", "PremiumSubscription")
+
+    levels = dict(PremiumSubscription.objects.values_list("organization_id", "level"))
+    queryset = Organization.objects.annotate(
+        has_images=Exists(OrganizationImage.objects.filter(page=OuterRef("pk")))
+    )
+    changed = []
+
+    for organization in queryset.order_by("pk").iterator(chunk_size=BATCH_SIZE):
+        # Wagtail pages use treebeard paths with steps of 4 characters.
+        organization.parent_path = organization.path[:-4]
+        organization.rank_key = make_rank_key(
+            is_open=not organization.temporarily_closed,
+            subscription_level=levels.get(organization.pk),
+            rating_weight=organization.avg_rating_weight,
+            rating_score=organization.rating_score,
+            has_images=organization.has_images,
+            published_at=organization.first_published_at,
+        )
+        changed.append(organization)
+
+        if len(changed) >= BATCH_SIZE:
+            Organization.objects.bulk_update(changed, ["parent_path", "rank_key"])
+            changed = []
+
+    if changed:
+        Organization.objects.bulk_update(changed, ["parent_path", "rank_key"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0009_searchindexqueue"),
+        ("subscription", "0002_alter_premiumsubscription_start_date"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="organization",
+            name="parent_path",
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="organization",
+            name="rank_key",
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="organization",
+            index=models.Index(
+                fields=["parent_path", "-rank_key"],
+                name="catalog_org_parent_rank_idx",
+            ),
+        ),
+        migrations.RunPython(fill_rank_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,123 @@
+# Generated by Django 5.2.1 on 2026-10-17 16:10
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+GEOHASH_PRECISION = 9
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+# Frozen copies of catalog.geo as of this migration, later changes of the
+# helpers must not change what the migration writes.
+def parse_ll(value):
+    if not value:
+        return None
+    cleaned = value.replace(";", ",").strip()
+    if "," in cleaned:
+        parts = [p.strip() for p in cleaned.split(",") if p.strip()]
+    else:
+        parts = cleaned.split()
+    if len(parts) < 2:
+        return None
+    try:
+        lat, lon = float(parts[0]), float(parts[1])
+    except ValueError:
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+
+def encode_geohash(lat, lon, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        value, bounds = (lon, lon_range) if even else (lat, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            bounds[0] = mid
+        else:
+            bounds[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def fill_coordinates(apps, schema_editor):
+    # The JSON-LD geo and the map points read the parsed coordinates.
+    for model_name in ["City", "Organization"]:
+        model = apps.get_model("catalog", model_name)
+        changed = []
+
+        for page in model.objects.order_by("pk").iterator(chunk_size=BATCH_SIZE):
+            point = parse_ll(page.ll)
+            if point is None:
+                continue
+            page.latitude, page.longitude = point
+            page.geohash = encode_geohash(*point)
+            changed.append(page)
+
+            if len(changed) >= BATCH_SIZE:
+                model.objects.bulk_update(changed, ["latitude", "longitude", "geohash"])
+                changed = []
+
+        if changed:
+            model.objects.bulk_update(changed, ["latitude", "longitude", "geohash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0010_organization_parent_path_rank_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="city",
+            name="geohash",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=12
+            ),
+        ),
+        migrations.AddField(
+            model_name="city",
+            name="latitude",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="city",
+            name="longitude",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="organization",
+            name="geohash",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=12
+            ),
+        ),
+        migrations.AddField(
+            model_name="organization",
+            name="latitude",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="organization",
+            name="longitude",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_coordinates, migrations.RunPython.noop),
+    ]
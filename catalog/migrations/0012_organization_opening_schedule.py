@@ -0,0 +1,51 @@
+# Generated by Django 5.2.1 on 2026-10-17 17:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0011_city_organization_coordinates"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="organization",
+            name="opening_schedule",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.CreateModel(
+            name="OrganizationOpeningInterval",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("start", models.PositiveSmallIntegerField()),
+                ("end", models.PositiveSmallIntegerField()),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="opening_intervals",
+                        to="catalog.organization",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["start", "end", "organization"],
+                        name="catalog_opening_interval_idx",
+                    )
+                ],
+            },
+        ),
+    ]
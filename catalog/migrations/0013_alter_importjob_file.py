@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:40
+
+import catalog.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0012_organization_opening_schedule"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="importjob",
+            name="file",
+            field=models.FileField(
+                blank=True,
+                storage=catalog.models.get_private_storage,
+                upload_to=catalog.models.get_import_file_path,
+                verbose_name="File",
+            ),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.1 on 2026-10-17 20:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0013_alter_importjob_file"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OrganizationMapCell",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("precision", models.PositiveSmallIntegerField()),
+                ("geohash", models.CharField(max_length=12)),
+                ("count", models.PositiveIntegerField()),
+                ("latitude", models.FloatField()),
+                ("longitude", models.FloatField()),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="catalog.organization",
+                    ),
+                ),
+                (
+                    "organization_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="map_cells",
+                        to="catalog.organizationtype",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["organization_type", "precision", "geohash"],
+                        name="catalog_map_cell_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,131 @@
+import re
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+TIME_24H_RE = re.compile(r"(\d{1,2}):(\d{2})(?::(\d{2}))?")
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+OPEN_24_HOURS = "24h"
+OPEN_UNTIL_LAST_CLIENT = "last_client"
+OPEN_UNTIL = "until"
+OPEN = "open"
+
+
+# Frozen copies of catalog.utils as of this migration, later changes of the
+# helpers must not change what the migration writes.
+def _to_minutes(value):
+    if value is None or value == "":
+        return None
+    if hasattr(value, "hour"):
+        return value.hour * 60 + value.minute
+    match = TIME_24H_RE.fullmatch(str(value).strip())
+    if not match:
+        return None
+    return int(match.group(1)) * 60 + int(match.group(2))
+
+
+def compile_weekly_schedule(days):
+    known_days = set()
+    intervals = []
+
+    for value in days:
+        try:
+            day = int(value.get("day"))
+        except (TypeError, ValueError):
+            continue
+        if not 1 <= day <= 7:
+            continue
+        known_days.add(day)
+        if value.get("holiday"):
+            continue
+
+        offset = (day - 1) * MINUTES_PER_DAY
+        start = _to_minutes(value.get("start"))
+        end = _to_minutes(value.get("end"))
+        if start is None and end is None:
+            continue
+        if end == MINUTES_PER_DAY - 1:
+            end = MINUTES_PER_DAY
+
+        if start == 0 and end == MINUTES_PER_DAY:
+            kind = OPEN_24_HOURS
+        elif value.get("last_client"):
+            kind = OPEN_UNTIL_LAST_CLIENT
+        elif end is not None:
+            kind = OPEN_UNTIL
+        else:
+            kind = OPEN
+
+        if start is None:
+            start = 0
+        if end is None:
+            end = MINUTES_PER_DAY
+        elif end <= start:
+            end += MINUTES_PER_DAY
+
+        intervals.append([offset + start, offset + end, kind])
+
+    return {"days": sorted(known_days), "intervals": sorted(intervals)}
+
+
+def split_week_intervals(intervals):
+    result = []
+    for start, end, _kind in intervals:
+        if end > MINUTES_PER_WEEK:
+            result.append((start, MINUTES_PER_WEEK))
+            result.append((0, end - MINUTES_PER_WEEK))
+        else:
+            result.append((start, end))
+    return result
+
+
+def save_schedules(Organization, OrganizationOpeningInterval, organizations):
+    Organization.objects.bulk_update(organizations, ["opening_schedule"])
+    OrganizationOpeningInterval.objects.filter(
+        organization__in=[organization.pk for organization in organizations]
+    ).delete()
+    OrganizationOpeningInterval.objects.bulk_create(
+        OrganizationOpeningInterval(organization=organization, start=start, end=end)
+        for organization in organizations
+        for start, end in split_week_intervals(
+            organization.opening_schedule.get("intervals", [])
+        )
+    )
+
+
+def fill_opening_schedules(apps, schema_editor):
+    # The open now filter reads the intervals, existing organizations must
+    # get them before they show up as open.
+    Organization = apps.get_model("catalog", "Organization")
+    OrganizationOpeningInterval = apps.get_model(
+        "catalog", "OrganizationOpeningInterval"
+    )
+    batch = []
+
+    for organization in Organization.objects.order_by("pk").iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        organization.opening_schedule = compile_weekly_schedule(
+            block.value for block in organization.working_hours
+        )
+        batch.append(organization)
+
+        if len(batch) >= BATCH_SIZE:
+            save_schedules(Organization, OrganizationOpeningInterval, batch)
+            batch = []
+
+    if batch:
+        save_schedules(Organization, OrganizationOpeningInterval, batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0014_organizationmapcell"),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_opening_schedules, migrations.RunPython.noop),
+    ]
@@ -2,9 +2,12 @@ from django import forms
 from django.conf import settings
 from django.core.cache import cache
 from django.core.cache.utils import make_template_fragment_key
+from django.core.files.storage import storages
 from django.db import models
-from django.db.models import Exists, F, OuterRef
+from django.db.models import Exists, OuterRef, Q
 from django.shortcuts import render
+from django.utils import timezone
+from django.utils.crypto import get_random_string
 from django.utils.translation import gettext_lazy as _
 from modelcluster.contrib.taggit import ClusterTaggableManager
 from modelcluster.fields import ParentalManyToManyField
@@ -19,10 +22,24 @@ from wagtail.admin.panels import (
 )
 from wagtail.contrib.routable_page.models import RoutablePageMixin, route
 from wagtail.fields import RichTextField, StreamField
-from wagtail.models import Orderable, Page, PageManager, ParentalKey
+from wagtail.models import Orderable, Page, PageManager, PageQuerySet, ParentalKey
 from wagtail.search import index
 from wagtail.snippets.models import register_snippet
 
+from catalog.geo import (
+    bbox_geohashes,
+    distance_expression,
+    encode_geohash,
+    parse_ll,
+    radius_bbox,
+)
+from catalog.utils import (
+    compile_weekly_schedule,
+    make_identity_key,
+    make_rank_key,
+    minute_of_week,
+    split_week_intervals,
+)
 from core import blocks
 from core.panels import Panels
 
@@ -48,38 +65,121 @@ class Language(models.Model):
         return str(self.language_name)
 
 
-class OrganizationManager(PageManager):
-    def get_queryset(self):
-        images = OrganizationImage.objects.filter(page=OuterRef("pk"))
-        queryset = (
-            (
-                super()
-                .get_queryset()
-                .select_related(
-                    "premium_subscription",
-                )
-                .prefetch_related(
-                    "images",
-                    "rewards",
-                )
-            )
-            .annotate(
-                subscription_priority=models.F("premium_subscription__level"),
-                has_images=Exists(images),
-            )
-            .order_by(
-                "temporarily_closed",
-                F("subscription_priority").desc(nulls_last=True),
-                "-avg_rating_weight",
-                "-rating_score",
-                F("has_images").desc(),
-                "-first_published_at",
-            )
+class OrganizationQuerySet(PageQuerySet):
+    def ranked(self):
+        """Add the listing joins and the ranking order.
+
+        The ranking is materialized in rank_key, see make_rank_key. Images
+        and rewards of a listing are loaded by get_organization_cards.
+        """
+        return self.select_related(
+            "premium_subscription",
+        ).order_by("-rank_key", "-pk")
+
+    def listed_in(self, parent):
+        """Filter the organizations listed on a city or organization type page.
+
+        Uses parent_path instead of the page path, so that the listing of an
+        organization type is served by the (parent_path, rank_key) index.
+        A city lists the organizations of its organization types, matched by
+        equality too, since a prefix match can't use the index on every
+        collation.
+        """
+        if parent.specific_class is OrganizationType:
+            return self.filter(parent_path=parent.path)
+        return self.filter(parent_path__in=parent.get_children().values("path"))
+
+    def in_bbox(self, south, west, north, east):
+        """Filter the organizations inside the bounding box.
+
+        The geohash prefixes of the box narrow the rows down by index range
+        scans, the coordinates cut off the cells sticking out of the box.
+        """
+        cells = Q()
+        for prefix in bbox_geohashes(south, west, north, east):
+            cells |= Q(geohash__startswith=prefix)
+        if west > east:
+            longitude = Q(longitude__gte=west) | Q(longitude__lte=east)
+        else:
+            longitude = Q(longitude__range=(west, east))
+        return self.filter(cells, longitude, latitude__range=(south, north))
+
+    def open_now(self, at=None):
+        """Filter the organizations open at the time, now by default."""
+        minute = minute_of_week(timezone.localtime(at))
+        intervals = OrganizationOpeningInterval.objects.filter(
+            organization=OuterRef("pk"), start__lte=minute, end__gt=minute
         )
-        return queryset
+        return self.filter(Exists(intervals))
+
+    def with_distance(self, lat, lon):
+        """Annotate the distance in km from the point."""
+        return self.annotate(distance=distance_expression(lat, lon))
+
+    def within_radius(self, lat, lon, radius_km):
+        """Filter the organizations within the radius, with their distance."""
+        return (
+            self.in_bbox(*radius_bbox(lat, lon, radius_km))
+            .with_distance(lat, lon)
+            .filter(distance__lte=radius_km)
+        )
+
+
+class OrganizationManager(PageManager.from_queryset(OrganizationQuerySet)):
+    def get_queryset(self):
+        return super().get_queryset().ranked()
+
+    def plain(self):
+        """Return organizations without the ranking, for counts and lookups."""
+        return super().get_queryset()
+
+
+class CoordinatesMixin(models.Model):
+    """Coordinates parsed from the ll field, with a geohash for index lookups."""
+
+    latitude = models.FloatField(null=True, blank=True, editable=False)
+    longitude = models.FloatField(null=True, blank=True, editable=False)
+    geohash = models.CharField(max_length=12, blank=True, editable=False, db_index=True)
+
+    class Meta:
+        abstract = True
+
+    def get_coordinates(self) -> tuple[float | None, float | None, str]:
+        point = parse_ll(self.ll)
+        if point is None:
+            return None, None, ""
+        return point[0], point[1], encode_geohash(*point)
+
+    def sync_coordinates(self) -> bool:
+        """Update the coordinates from the ll field, return whether they changed."""
+        coordinates = self.get_coordinates()
+        if coordinates == (self.latitude, self.longitude, self.geohash):
+            return False
+        self.latitude, self.longitude, self.geohash = coordinates
+        return True
+
+    @classmethod
+    def refresh_coordinates(cls, queryset, batch_size=1000) -> int:
+        """Recompute the coordinates of the pages in the queryset."""
+        changed = []
+        updated = 0
+        fields = ["latitude", "longitude", "geohash"]
+
+        for page in queryset.order_by("pk").iterator(chunk_size=batch_size):
+            if page.sync_coordinates():
+                changed.append(page)
+
+            if len(changed) >= batch_size:
+                updated += queryset.model._base_manager.bulk_update(changed, fields)
+                changed = []
+
+        if changed:
+            updated += queryset.model._base_manager.bulk_update(changed, fields)
+
+        return updated
 
 
-class City(Panels, Page):
+class City(CoordinatesMixin, Panels, Page):
     """City page model."""
 
     template = "catalog/city_page.html"
@@ -136,6 +236,10 @@ class City(Panels, Page):
         verbose_name = _("City")
         verbose_name_plural = _("Cities")
 
+    def save(self, *args, **kwargs):
+        self.sync_coordinates()
+        return super().save(*args, **kwargs)
+
 
 class OrganizationType(RoutablePageMixin, Panels, Page):
     """Organization type page model."""
@@ -183,7 +287,8 @@ class OrganizationType(RoutablePageMixin, Panels, Page):
     def map_view(self, request, *args, **kwargs):
         """Map view of the organization type."""
         organizations = (
-            Organization.objects.live()
+            Organization.objects.plain()
+            .live()
             .filter(show_on_map=True)
             .descendant_of(self)
             .distinct()
@@ -226,7 +331,7 @@ class OrganizationType(RoutablePageMixin, Panels, Page):
         verbose_name_plural = _("Organization types")
 
 
-class Organization(Page):
+class Organization(CoordinatesMixin, Page):
     """Organization page model."""
 
     objects = OrganizationManager()
@@ -249,6 +354,35 @@ class Organization(Page):
         verbose_name=_("Legal name"),
     )
 
+    # ID of the organization in the partner feed it is synced from.
+    external_id = models.CharField(
+        max_length=255,
+        blank=True,
+        db_index=True,
+        verbose_name=_("External ID"),
+    )
+
+    # Hash of the normalized legal name and address, scoped by the parent page.
+    identity_key = models.CharField(
+        max_length=40,
+        blank=True,
+        db_index=True,
+        editable=False,
+    )
+
+    # Copy of the parent page path and the packed listing order, so that a
+    # listing of an organization type is a scan of one index.
+    parent_path = models.CharField(
+        max_length=255,
+        blank=True,
+        editable=False,
+    )
+    rank_key = models.BigIntegerField(
+        default=0,  # type: ignore
+        db_index=True,
+        editable=False,
+    )
+
     verified = models.BooleanField(
         _("Verified"),
         default=False,  # type: ignore
@@ -297,6 +431,14 @@ class Organization(Page):
         verbose_name=_("Working hours"),
     )
 
+    # Working hours compiled into minute-of-week intervals, see
+    # compile_weekly_schedule. Mirrored in OrganizationOpeningInterval.
+    opening_schedule = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+    )
+
     temporarily_closed = models.BooleanField(
         _("Temporarily closed"),
         default=False,  # type: ignore
@@ -377,6 +519,7 @@ class Organization(Page):
         TitleFieldPanel("title", targets=["slug"]),
         FieldPanel("tin"),
         FieldPanel("legal_name"),
+        FieldPanel("external_id"),
         FieldPanel("working_hours", icon="time"),
         FieldPanel(
             "languages",
@@ -484,6 +627,12 @@ class Organization(Page):
     class Meta(Page.Meta):
         verbose_name = _("Organization")
         verbose_name_plural = _("Organizations")
+        indexes = [
+            models.Index(
+                fields=["parent_path", "-rank_key"],
+                name="catalog_org_parent_rank_idx",
+            ),
+        ]
 
     def get_context(self, request):
         """Get the context for the template."""
@@ -491,7 +640,134 @@ class Organization(Page):
         context["service_types"] = self.service_types.select_related("category").all()
         return context
 
+    def get_identity_key(self) -> str:
+        """Return the duplicate detection key of the organization."""
+        address = getattr(self, "address_en", None) or ""
+        return make_identity_key(self.get_parent_path(), self.legal_name, address)
+
+    def get_parent_path(self) -> str:
+        return self.path[: -self.steplen] if self.path else ""
+
+    def get_rank_key(self, has_images: bool) -> int:
+        """Return the packed listing order of the organization."""
+        subscription = getattr(self, "premium_subscription", None)
+        return make_rank_key(
+            is_open=not self.temporarily_closed,
+            subscription_level=subscription.level if subscription else None,
+            rating_weight=self.avg_rating_weight,
+            rating_score=self.rating_score,
+            has_images=has_images,
+            published_at=self.first_published_at,
+        )
+
+    @classmethod
+    def refresh_rank_keys(cls, queryset, batch_size=1000) -> int:
+        """Recompute the parent paths and rank keys of the organizations."""
+        images = OrganizationImage.objects.filter(page=OuterRef("pk"))
+        queryset = queryset.select_related("premium_subscription").annotate(
+            has_images=Exists(images)
+        )
+        changed = []
+        updated = 0
+
+        for organization in queryset.order_by("pk").iterator(chunk_size=batch_size):
+            parent_path = organization.get_parent_path()
+            rank_key = organization.get_rank_key(organization.has_images)
+            if (parent_path, rank_key) != (
+                organization.parent_path,
+                organization.rank_key,
+            ):
+                organization.parent_path = parent_path
+                organization.rank_key = rank_key
+                changed.append(organization)
+
+            if len(changed) >= batch_size:
+                updated += cls.objects.plain().bulk_update(
+                    changed, ["parent_path", "rank_key"]
+                )
+                changed = []
+
+        if changed:
+            updated += cls.objects.plain().bulk_update(
+                changed, ["parent_path", "rank_key"]
+            )
+
+        return updated
+
+    @classmethod
+    def refresh_identity_keys(cls, queryset, batch_size=1000) -> int:
+        """Recompute the identity keys of the organizations in the queryset."""
+        changed = []
+        updated = 0
+
+        for organization in queryset.order_by("pk").iterator(chunk_size=batch_size):
+            key = organization.get_identity_key()
+            if key != organization.identity_key:
+                organization.identity_key = key
+                changed.append(organization)
+
+            if len(changed) >= batch_size:
+                updated += cls.objects.plain().bulk_update(changed, ["identity_key"])
+                changed = []
+
+        if changed:
+            updated += cls.objects.plain().bulk_update(changed, ["identity_key"])
+
+        return updated
+
+    def get_opening_schedule(self) -> dict:
+        return compile_weekly_schedule(
+            block.value for block in self.working_hours  # type: ignore
+        )
+
+    @classmethod
+    def replace_opening_intervals(cls, organizations):
+        """Rewrite the opening interval rows of the organizations."""
+        OrganizationOpeningInterval.objects.filter(
+            organization__in=[organization.pk for organization in organizations]
+        ).delete()
+        OrganizationOpeningInterval.objects.bulk_create(
+            OrganizationOpeningInterval(organization=organization, start=start, end=end)
+            for organization in organizations
+            for start, end in split_week_intervals(
+                organization.opening_schedule.get("intervals", [])
+            )
+        )
+
+    @classmethod
+    def refresh_opening_schedules(cls, queryset, batch_size=1000) -> int:
+        """Recompile the opening schedules and intervals of the organizations."""
+        batch = []
+        updated = 0
+
+        for organization in queryset.order_by("pk").iterator(chunk_size=batch_size):
+            organization.opening_schedule = organization.get_opening_schedule()
+            batch.append(organization)
+
+            if len(batch) >= batch_size:
+                updated += cls.objects.plain().bulk_update(batch, ["opening_schedule"])
+                cls.replace_opening_intervals(batch)
+                batch = []
+
+        if batch:
+            updated += cls.objects.plain().bulk_update(batch, ["opening_schedule"])
+            cls.replace_opening_intervals(batch)
+
+        return updated
+
     def save(self, *args, **kwargs):
+        self.sync_coordinates()
+        self.identity_key = self.get_identity_key()
+        self.parent_path = self.get_parent_path()
+        schedule_changed = False
+        if kwargs.get("update_fields") is None:
+            # Images are read from the in-memory cluster, as they are saved.
+            self.rank_key = self.get_rank_key(has_images=bool(self.images.all()))
+            schedule = self.get_opening_schedule()
+            # Copied pages carry the schedule but not the interval rows.
+            schedule_changed = self._state.adding or schedule != self.opening_schedule
+            self.opening_schedule = schedule
+
         keys = ["organization", "organization_images", "organization_item"]
         languages = getattr(settings, "LANGUAGES", ["en"])
 
@@ -499,7 +775,10 @@ class Organization(Page):
             for lang in languages:
                 cache.delete(make_template_fragment_key(key, [self.pk, lang[0]]))
 
-        return super().save(*args, **kwargs)
+        result = super().save(*args, **kwargs)
+        if schedule_changed:
+            self.replace_opening_intervals([self])
+        return result
 
 
 class OrganizationImage(Orderable):
@@ -524,6 +803,57 @@ class OrganizationImage(Orderable):
         verbose_name_plural = _("Images")
 
 
+class OrganizationOpeningInterval(models.Model):
+    """Opening interval of an organization in minutes of the week."""
+
+    organization = models.ForeignKey(
+        "catalog.Organization",
+        on_delete=models.CASCADE,
+        related_name="opening_intervals",
+    )
+    start = models.PositiveSmallIntegerField()
+    end = models.PositiveSmallIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["start", "end", "organization"],
+                name="catalog_opening_interval_idx",
+            ),
+        ]
+
+
+class OrganizationMapCell(models.Model):
+    """
+    Map organizations of a type grouped by geohash cell at one precision,
+    with their centroid and the best ranked one. See refresh_map_cells.
+    """
+
+    organization_type = models.ForeignKey(
+        "catalog.OrganizationType",
+        on_delete=models.CASCADE,
+        related_name="map_cells",
+    )
+    precision = models.PositiveSmallIntegerField()
+    geohash = models.CharField(max_length=12)
+    count = models.PositiveIntegerField()
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    organization = models.ForeignKey(
+        "catalog.Organization",
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["organization_type", "precision", "geohash"],
+                name="catalog_map_cell_idx",
+            ),
+        ]
+
+
 @register_snippet
 class Reward(models.Model):
     """Reward model."""
@@ -669,3 +999,112 @@ class OrganizationServiceType(ItemBase):
         on_delete=models.CASCADE,
         related_name="tagged_items",
     )
+
+
+def get_private_storage():
+    return storages["private"]
+
+
+def get_import_file_path(instance, filename) -> str:
+    """Return an unguessable name for an uploaded import file."""
+    return f"imports/{get_random_string(32)}.{instance.format}"
+
+
+class ImportJob(models.Model):
+    """Background import/update of organizations from an uploaded file."""
+
+    class Kind(models.TextChoices):
+        IMPORT = "import", _("Import")
+        UPDATE = "update", _("Update")
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("Pending")
+        RUNNING = "running", _("Running")
+        FINISHED = "finished", _("Finished")
+        FAILED = "failed", _("Failed")
+
+    kind = models.CharField(
+        max_length=10,
+        choices=Kind.choices,
+        default=Kind.IMPORT,
+        verbose_name=_("Kind"),
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name=_("Status"),
+    )
+    format = models.CharField(
+        max_length=10,
+        default="csv",
+        verbose_name=_("Format"),
+    )
+    file = models.FileField(
+        upload_to=get_import_file_path,
+        storage=get_private_storage,
+        blank=True,
+        verbose_name=_("File"),
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="+",
+        verbose_name=_("User"),
+    )
+    total = models.PositiveIntegerField(default=0, verbose_name=_("Total"))
+    processed = models.PositiveIntegerField(default=0, verbose_name=_("Processed"))
+    failed = models.PositiveIntegerField(default=0, verbose_name=_("Failed"))
+    message = models.TextField(blank=True, verbose_name=_("Message"))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Created at"))
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()} #{self.pk}"  # type: ignore
+
+    class Meta:
+        verbose_name = _("Import job")
+        verbose_name_plural = _("Import jobs")
+        ordering = ["-created_at"]
+
+
+class ImportJobError(models.Model):
+    """A row of an import job which could not be imported."""
+
+    job = models.ForeignKey(
+        "catalog.ImportJob",
+        on_delete=models.CASCADE,
+        related_name="errors",
+    )
+    row = models.PositiveIntegerField(verbose_name=_("Row"))
+    message = models.TextField(verbose_name=_("Message"))
+
+    def __str__(self) -> str:
+        return f"{self.row}: {self.message}"
+
+    class Meta:
+        verbose_name = _("Import job error")
+        verbose_name_plural = _("Import job errors")
+        ordering = ["row"]
+
+
+class SearchIndexQueue(models.Model):
+    """An organization whose search index entry is out of date."""
+
+    organization = models.OneToOneField(
+        "catalog.Organization",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="+",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return str(self.organization_id)
+
+    class Meta:
+        verbose_name = _("Search index queue item")
+        verbose_name_plural = _("Search index queue")
@@ -0,0 +1,29 @@
+from catalog.services import CARD_IMAGE_FILTERS, MAP_IMAGE_FILTER, REWARD_ICON_FILTERS
+from core.renditions import register_renditions
+
+# Gallery of the organization page, the JSON-LD and the map images.
+ORGANIZATION_PAGE_FILTERS = [
+    "original",
+    "original|format-webp",
+    "width-1200",
+    MAP_IMAGE_FILTER,
+]
+
+register_renditions(
+    "organization-images",
+    "catalog.OrganizationImage",
+    "image",
+    CARD_IMAGE_FILTERS + ORGANIZATION_PAGE_FILTERS,
+)
+register_renditions(
+    "default-organization-image",
+    "core.SiteSettings",
+    "default_organization_image",
+    CARD_IMAGE_FILTERS + ORGANIZATION_PAGE_FILTERS,
+)
+register_renditions(
+    "reward-icons",
+    "catalog.Reward",
+    "icon",
+    REWARD_ICON_FILTERS,
+)
@@ -0,0 +1,182 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import translation
+from modeltranslation.utils import build_localized_fieldname
+from wagtail.models import Page
+from wagtail.search.backends import get_search_backends
+from wagtail.search.signal_handlers import post_save_signal_handler
+
+from catalog.models import City, Organization, SearchIndexQueue
+from catalog.utils import fold_accents
+from core.cache import LocalCache
+
+REINDEX_BATCH_SIZE = 500
+CITY_SEARCH_LIMIT = 20
+
+# Per language: the prefix index of the city search and the cities by path.
+_city_cache = LocalCache("cities")
+
+# IDs of the organizations saved inside defer_search_index, None outside.
+_dirty_ids: ContextVar[set | None] = ContextVar("dirty_organization_ids", default=None)
+
+
+def deferred_post_save_handler(sender, instance, **kwargs):
+    """Index a saved organization, or only remember it while deferred."""
+    dirty_ids = _dirty_ids.get()
+    if dirty_ids is None:
+        post_save_signal_handler(instance, **kwargs)
+    else:
+        dirty_ids.add(instance.pk)
+
+
+@contextmanager
+def defer_search_index(background: bool = False):
+    """Suspend search index updates of saved organizations.
+
+    The saved organizations are queued on exit and reindexed in batches once
+    the transaction commits, or by a background task. Nested blocks are
+    flushed by the outermost one.
+    """
+    if _dirty_ids.get() is not None:
+        yield
+        return
+
+    dirty_ids = set()
+    token = _dirty_ids.set(dirty_ids)
+    try:
+        yield
+    finally:
+        _dirty_ids.reset(token)
+        if dirty_ids:
+            queue_reindex(dirty_ids, background)
+
+
+def queue_reindex(ids, background: bool = False) -> None:
+    """Add organizations to the search index queue and schedule a reindex."""
+    SearchIndexQueue.objects.bulk_create(
+        [SearchIndexQueue(organization_id=id) for id in ids],
+        ignore_conflicts=True,
+    )
+
+    if background:
+        from catalog.tasks import reindex_queued_organizations
+
+        transaction.on_commit(lambda: reindex_queued_organizations.enqueue())
+    else:
+        # Only the organizations of this block, the rest of the queue is
+        # drained by the task and the reindex_organizations command.
+        ids = list(ids)
+        transaction.on_commit(lambda: reindex_dequeued(ids))
+
+
+def reindex_organizations(ids) -> None:
+    """Update the search index entries of the organizations in one bulk call."""
+    organizations = list(Organization.get_indexed_objects().filter(pk__in=ids))
+    if not organizations:
+        return
+
+    for backend in get_search_backends(with_auto_update=True):
+        backend.add_bulk(Organization, organizations)
+
+
+def reindex_dequeued(ids) -> None:
+    """Reindex the organizations and remove them from the queue."""
+    reindex_organizations(ids)
+    SearchIndexQueue.objects.filter(organization_id__in=ids).delete()
+
+
+def reindex_queued(batch_size: int = REINDEX_BATCH_SIZE) -> int:
+    """Reindex the queued organizations in batches and return their number.
+
+    Every batch is locked until it is deleted, concurrent drains skip it.
+    """
+    count = 0
+
+    while True:
+        with transaction.atomic():
+            ids = list(
+                SearchIndexQueue.objects.select_for_update(skip_locked=True)
+                .order_by("created_at")
+                .values_list("organization_id", flat=True)[:batch_size]
+            )
+            if not ids:
+                return count
+
+            reindex_dequeued(ids)
+        count += len(ids)
+
+
+def build_city_index(language: str) -> tuple[list[str], list[tuple]]:
+    """
+    Return the prefix index of the live cities for the language.
+
+    Every city is found by its title in any translated language, the entry
+    holds the title and the url in the language.
+    """
+    fields = [
+        build_localized_fieldname("title", code)
+        for code in settings.MODELTRANSLATION_LANGUAGES
+    ]
+    entries = []
+
+    with translation.override(language):
+        for city in City.objects.live().order_by("pk"):
+            title, url = city.title, city.url
+            keys = {fold_accents(getattr(city, field, None)) for field in fields}
+            keys.add(fold_accents(title))
+            keys.discard("")
+            entries.extend((key, city.pk, title, url) for key in keys)
+
+    entries.sort()
+    return [entry[0] for entry in entries], entries
+
+
+def search_cities(query: str, limit: int = CITY_SEARCH_LIMIT) -> list[dict]:
+    """Return the cities whose title starts with the query, from memory."""
+    language = translation.get_language()
+    keys, entries = _city_cache.get(
+        ("index", language), lambda: build_city_index(language)
+    )
+
+    prefix = fold_accents(query.strip())
+    cities = {}
+    for index in range(bisect_left(keys, prefix), len(keys)):
+        if not keys[index].startswith(prefix):
+            break
+        _key, pk, title, url = entries[index]
+        cities.setdefault(pk, {"url": url, "title": title})
+
+    return sorted(cities.values(), key=lambda city: city["title"].casefold())[:limit]
+
+
+def build_city_paths(language: str) -> dict[str, dict]:
+    """Return the title and url in the language of every city by page path."""
+    with translation.override(language):
+        return {
+            city.path: {"title": city.title, "url": city.url}
+            for city in City.objects.all()
+        }
+
+
+def get_city_by_path(path: str) -> dict | None:
+    """
+    Return the title and url of the city of the page path, the page itself
+    or its nearest ancestor, without queries.
+    """
+    language = translation.get_language()
+    cities = _city_cache.get(("paths", language), lambda: build_city_paths(language))
+
+    for end in range(len(path), 0, -Page.steplen):
+        city = cities.get(path[:end])
+        if city:
+            return city
+    return None
+
+
+def invalidate_city_index():
+    """Rebuild the city search index and paths of every process on next use."""
+    _city_cache.invalidate()
@@ -1,15 +1,66 @@
-from datetime import datetime, time
-from datetime import time as dtime
-
-from django.utils import timezone
+import hashlib
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Avg, Count, F, Max, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Concat, JSONObject, Substr
+from django.utils import timezone, translation
+from django.utils.translation import get_language
 from django.utils.translation import gettext_lazy as _
-
-from catalog.models import Organization
-from catalog.utils import to_12h
-from core.utils import is_catalog_city, is_page, paginate
-
-
-def get_working_hours_service(organization: Organization) -> str:
+from wagtail.images import get_image_model
+from wagtail.images.models import Rendition
+
+from catalog.geo import bbox_cell_count, bbox_geohashes, snap_bbox
+from catalog.models import (
+    Organization,
+    OrganizationImage,
+    OrganizationMapCell,
+    OrganizationReward,
+)
+from catalog.search import get_city_by_path
+from catalog.utils import (
+    MINUTES_PER_DAY,
+    OPEN_24_HOURS,
+    OPEN_UNTIL,
+    OPEN_UNTIL_LAST_CLIENT,
+    find_open_interval,
+    minute_of_week,
+    parse_flag,
+    to_12h,
+)
+from core.cache import get_tree_version, persistent_cache
+from core.models import SiteSettings
+from core.utils import (
+    cursor_paginate,
+    get_count_key,
+    is_page,
+    paginate,
+)
+
+
+# Sort keys of the organization listings, see OrganizationQuerySet.ranked.
+ORGANIZATION_KEYS = ("-rank_key", "-pk")
+
+# Planner estimates for the counts of the whole catalog listing, off by
+# default. Only used above COUNT_ESTIMATE_THRESHOLD, see get_cached_count.
+ESTIMATE_LISTING_COUNTS = getattr(settings, "CATALOG_ESTIMATE_COUNTS", False)
+
+# Derived presentation values only change with a new revision.
+PRESENTATION_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
+# IDs of the organizations published inside defer_presentation, None outside.
+_presentation_ids: ContextVar[set | None] = ContextVar(
+    "presentation_organization_ids", default=None
+)
+
+
+def build_working_hours_text(organization: Organization) -> str:
     """Render working hours for the organization."""
 
     def format_time(value):
@@ -119,21 +170,14 @@ def get_current_city_service(context) -> str:
 
     page = context.get("page")
 
-    if not is_page(page):
+    if not is_page(page) or not page.path:
         return ""
 
-    if is_catalog_city(page):
-        return page.specific.title
-
-    # Try to get the city from parent pages
-    for parent_page in page.get_ancestors().reverse():
-        if is_catalog_city(parent_page):
-            return parent_page.specific.title
+    city = get_city_by_path(page.path)
+    return city["title"] if city else ""
 
-    return ""
 
-
-def get_phones_service(organization: Organization) -> list:
+def build_phones(organization: Organization) -> list:
     """Return formatted phones for the organization."""
     phones = []
 
@@ -149,7 +193,7 @@ def get_phones_service(organization: Organization) -> list:
     return phones
 
 
-def get_website_links_service(organization: Organization) -> list:
+def build_website_links(organization: Organization) -> list:
     """Return formatted website links for the organization."""
     links = []
 
@@ -166,8 +210,8 @@ def get_website_links_service(organization: Organization) -> list:
     return links
 
 
-def get_social_networks_service(organization: Organization) -> list:
-    """Return formatted social networks for the organization."""
+def build_social_networks(organization) -> list:
+    """Return formatted social networks for the organization or the site."""
     networks = []
 
     if not organization.social_networks:
@@ -183,9 +227,125 @@ def get_social_networks_service(organization: Organization) -> list:
     return networks
 
 
+def build_presentation(organization: Organization) -> dict:
+    """Return the derived presentation values of the organization."""
+    return {
+        "working_hours": build_working_hours_text(organization),
+        "phones": build_phones(organization),
+        "website_links": build_website_links(organization),
+        "social_networks": build_social_networks(organization),
+    }
+
+
+def get_presentation_key(organization: Organization) -> str | None:
+    """Return the cache key of the presentation values in the active language."""
+    if not organization.pk or not organization.latest_revision_id:
+        return None
+    return "organization-presentation:{}:{}:{}".format(
+        organization.pk, organization.latest_revision_id, get_language()
+    )
+
+
+def get_presentation(organization: Organization, preview=False) -> dict:
+    """
+    Return the presentation values of the organization, memoized per page
+    revision and language in the persistent cache.
+
+    Previews render unsaved content under the saved revision id, so they
+    are never read from or written to the cache.
+    """
+    cache_key = None if preview else get_presentation_key(organization)
+    if cache_key is None:
+        return build_presentation(organization)
+
+    # Pages render several of the values, the cache is read once.
+    memo = getattr(organization, "_presentation", None)
+    if memo and memo[0] == cache_key:
+        return memo[1]
+
+    data = persistent_cache.get(cache_key)
+    if data is None:
+        data = build_presentation(organization)
+        persistent_cache.set(cache_key, data, PRESENTATION_CACHE_TIMEOUT)
+
+    organization._presentation = (cache_key, data)
+    return data
+
+
+def precompute_presentation(organization: Organization):
+    """
+    Cache the presentation values of the organization in the default
+    language. The other languages are built on their first read.
+    """
+    with translation.override(settings.LANGUAGE_CODE):
+        cache_key = get_presentation_key(organization)
+        if cache_key:
+            persistent_cache.set(
+                cache_key, build_presentation(organization), PRESENTATION_CACHE_TIMEOUT
+            )
+
+
+def queue_presentation(ids) -> None:
+    """Precompute the presentation values in the background after the commit.
+
+    Pages read before the task has run build their values on the first read,
+    see get_presentation.
+    """
+    deferred_ids = _presentation_ids.get()
+    if deferred_ids is not None:
+        deferred_ids.update(ids)
+        return
+
+    from catalog.tasks import precompute_organization_presentations
+
+    ids = list(ids)
+    if ids:
+        transaction.on_commit(
+            lambda: precompute_organization_presentations.enqueue(ids)
+        )
+
+
+@contextmanager
+def defer_presentation():
+    """Queue the organizations published in the block as one task on exit."""
+    if _presentation_ids.get() is not None:
+        yield
+        return
+
+    ids = set()
+    token = _presentation_ids.set(ids)
+    try:
+        yield
+    finally:
+        _presentation_ids.reset(token)
+        queue_presentation(sorted(ids))
+
+
+def get_working_hours_service(organization: Organization, preview=False) -> str:
+    """Return the working hours text of the organization."""
+    return get_presentation(organization, preview)["working_hours"]
+
+
+def get_phones_service(organization: Organization, preview=False) -> list:
+    """Return formatted phones for the organization."""
+    return get_presentation(organization, preview)["phones"]
+
+
+def get_website_links_service(organization: Organization, preview=False) -> list:
+    """Return formatted website links for the organization."""
+    return get_presentation(organization, preview)["website_links"]
+
+
+def get_social_networks_service(organization, preview=False) -> list:
+    """Return formatted social networks for the organization or the site."""
+    if not isinstance(organization, Organization):
+        return build_social_networks(organization)
+    return get_presentation(organization, preview)["social_networks"]
+
+
 def get_organizations_count_service() -> str:
     """Return the count of organizations."""
-    count = Organization.objects.live().count()
+    count = Organization.objects.plain().live().count()
     return f"{count:,}".replace(",", " ")
 
 
@@ -194,7 +354,8 @@ def get_updated_organizations_count_service() -> str:
 
     def get_count(days: int) -> int:
         return (
-            Organization.objects.live()
+            Organization.objects.plain()
+            .live()
             .filter(
                 latest_revision_created_at__gte=timezone.now()
                 - timezone.timedelta(days=days)
@@ -216,7 +377,476 @@ def get_located_in_service(organization: Organization):
     """Return organizations located in the building."""
     if not organization.pk:
         return []
-    return organization.located_organizations.filter(locale=organization.locale)
+    # Plain skips the listing joins, the ranking order is kept.
+    return (
+        Organization.objects.plain()
+        .filter(located_in=organization, locale=organization.locale)
+        .order_by("-rank_key", "-pk")
+    )
+
+
+# Renditions rendered by catalog/includes/organization-item.html.
+CARD_IMAGE_FILTERS = [
+    "max-165x165",
+    "width-720|format-avif",
+    "width-720|format-webp",
+    "width-720|format-jpeg",
+]
+# Renditions rendered by includes/rewards.html.
+REWARD_ICON_FILTERS = [
+    "fill-100x100",
+    "fill-100x100|format-webp",
+]
+
+
+class OrganizationCard:
+    """Everything an organization listing item renders, loaded in bulk."""
+
+    def __init__(self, organization: Organization, image=None, rewards=None):
+        self.organization = organization
+        self.pk = organization.pk
+        self.url = organization.url
+        self.title = organization.title
+        self.h1_title = organization.h1_title
+        self.address = organization.address
+        self.search_description = organization.search_description
+        self.avg_rating = organization.avg_rating
+        self.verified = organization.verified
+        self.temporarily_closed = organization.temporarily_closed
+        self.subscription = getattr(organization, "premium_subscription", None)
+        self.subscription_classname = (
+            self.subscription.classname if self.subscription else ""
+        )
+        # The first gallery image or the default one, renditions prefetched.
+        self.image = image
+        self.rewards = rewards or []
+
+
+def get_organization_cards(organizations) -> list[OrganizationCard]:
+    """
+    Return the listing cards of the organizations in a constant number of
+    queries: first images and rewards with their renditions.
+    """
+    organizations = list(organizations)
+    ids = [organization.pk for organization in organizations]
+    if not ids:
+        return []
+
+    image_ids = {}
+    for page_id, image_id in (
+        OrganizationImage.objects.filter(page_id__in=ids)
+        .order_by("page_id", "sort_order")
+        .values_list("page_id", "image_id")
+    ):
+        image_ids.setdefault(page_id, image_id)
+
+    default_image_id = SiteSettings.load().default_organization_image_id
+    if default_image_id:
+        image_ids_to_load = set(image_ids.values()) | {default_image_id}
+    else:
+        image_ids_to_load = set(image_ids.values())
+
+    rewards = {}
+    for reward in (
+        OrganizationReward.objects.filter(page_id__in=ids)
+        .select_related("reward")
+        .order_by("page_id", "sort_order")
+    ):
+        rewards.setdefault(reward.page_id, []).append(reward)
+
+    icon_ids = {reward.reward.icon_id for items in rewards.values() for reward in items}
+
+    Image = get_image_model()
+    images = Image.objects.filter(pk__in=image_ids_to_load).prefetch_renditions(
+        *CARD_IMAGE_FILTERS
+    )
+    images = {image.pk: image for image in images}
+    icons = Image.objects.filter(pk__in=icon_ids).prefetch_renditions(
+        *REWARD_ICON_FILTERS
+    )
+    icons = {icon.pk: icon for icon in icons}
+
+    for items in rewards.values():
+        for reward in items:
+            reward.reward.icon = icons.get(reward.reward.icon_id)
+
+    return [
+        OrganizationCard(
+            organization,
+            image=images.get(image_ids.get(organization.pk, default_image_id)),
+            rewards=rewards.get(organization.pk),
+        )
+        for organization in organizations
+    ]
+
+
+def get_organization_card_service(organization: Organization) -> OrganizationCard:
+    """Return the listing card of a single organization."""
+    return get_organization_cards([organization])[0]
+
+
+def get_stream_organization_cards(stream) -> dict[int, OrganizationCard]:
+    """Return the cards of the organization blocks of a stream by page id."""
+    # Deleted pages leave None values behind.
+    organizations = [
+        child.value
+        for child in stream
+        if child.block_type == "organization" and child.value is not None
+    ]
+    return {card.pk: card for card in get_organization_cards(organizations)}
+
+
+# Rendition linked by the map popups, registered in catalog/renditions.py.
+MAP_IMAGE_FILTER = "width-720"
+MAP_DATA_TIMEOUT = 60 * 60 * 24
+
+
+def with_map_payload(queryset, org_type):
+    """Annotate the map popup payload of the organizations of the type."""
+    first_image_id_sq = (
+        OrganizationImage.objects.filter(page_id=OuterRef("pk"))
+        .order_by("sort_order")
+        .values("image_id")[:1]
+    )
+    rendition_file_sq = Rendition.objects.filter(
+        image_id=Subquery(first_image_id_sq), filter_spec=MAP_IMAGE_FILTER
+    ).values("file")[:1]
+    original_file_sq = (
+        OrganizationImage.objects.filter(page_id=OuterRef("pk"))
+        .order_by("sort_order")
+        .values("image__file")[:1]
+    )
+    default_image = SiteSettings.load().default_organization_image
+    image_file = Coalesce(
+        Subquery(rendition_file_sq),
+        Subquery(original_file_sq),
+        Value(default_image.file.name if default_image else None),
+    )
+
+    return queryset.annotate(
+        payload=JSONObject(
+            title=F("title"),
+            rating=F("avg_rating"),
+            ll=F("ll"),
+            url=Concat(Value(org_type.url), F("slug"), Value("/")),
+            image=Concat(Value(settings.MEDIA_URL), image_file),
+        ),
+    )
+
+
+def build_map_data(org_type) -> dict:
+    """Return the map payloads of the live organizations of the type by id."""
+    qs = with_map_payload(
+        Organization.objects.plain().live().descendant_of(org_type), org_type
+    ).values_list("id", "payload")
+    return {str(pk): payload for pk, payload in qs}
+
+
+def get_map_data_service(org_type) -> dict:
+    """
+    Return the serialized map data of the organization type with its ETag
+    and modification time.
+
+    The data is cached per type and language under the version of the type
+    subtree, see core.cache, so any change of a page under it refreshes it.
+    """
+    cache_key = "map-data:{}:{}:{}".format(
+        org_type.pk, get_language(), get_tree_version(org_type.path)
+    )
+    entry = cache.get(cache_key)
+    if entry is None:
+        content = json.dumps(
+            build_map_data(org_type),
+            cls=DjangoJSONEncoder,
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        entry = {
+            "content": content,
+            "etag": hashlib.md5(content.encode()).hexdigest(),
+            "last_modified": int(timezone.now().timestamp()),
+        }
+        cache.set(cache_key, entry, MAP_DATA_TIMEOUT)
+    return entry
+
+
+# Geohash precision of the map clusters by zoom level, zoom 0 first.
+MAP_ZOOM_PRECISION = [1, 1, 2, 2, 3, 3, 3, 4, 4, 5, 5, 5, 6, 6, 7, 7]
+# From this zoom on single organizations are returned instead of clusters.
+MAP_POINTS_ZOOM = len(MAP_ZOOM_PRECISION)
+# Precision of the grid the bounding box of the points is snapped to.
+MAP_POINTS_PRECISION = 6
+MAP_MAX_CELLS = 256
+MAP_MAX_POINTS = 500
+# Precisions of the precomputed cells, all the cluster precisions.
+MAP_CELL_PRECISIONS = range(1, max(MAP_ZOOM_PRECISION) + 1)
+
+
+def get_map_precision(zoom: int, bbox: tuple) -> int:
+    """Return the cluster precision of the zoom, coarse enough for the box."""
+    precision = MAP_ZOOM_PRECISION[min(max(zoom, 0), MAP_POINTS_ZOOM - 1)]
+    while precision > 1 and bbox_cell_count(*bbox, precision) > MAP_MAX_CELLS:
+        precision -= 1
+    return precision
+
+
+def get_map_points(queryset, org_type) -> list[dict] | None:
+    """Return the single organizations or None if there are too many of them."""
+    points = list(
+        with_map_payload(queryset, org_type)
+        .order_by("-rank_key", "-pk")
+        .values("id", "latitude", "longitude", "payload")[: MAP_MAX_POINTS + 1]
+    )
+    if len(points) > MAP_MAX_POINTS:
+        return None
+    return points
+
+
+def get_map_clusters(queryset, org_type, precision: int) -> list[dict]:
+    """
+    Group the organizations by the geohash cell at the precision.
+
+    Every cluster has the number of organizations, their centroid and the
+    payload of the best ranked one.
+    """
+    cells = list(
+        queryset.annotate(cell=Substr("geohash", 1, precision))
+        .values("cell")
+        .annotate(
+            count=Count("pk"),
+            latitude=Avg("latitude"),
+            longitude=Avg("longitude"),
+            top_rank_key=Max("rank_key"),
+        )
+        .order_by()
+    )
+
+    # The same rank key may occur in other cells, so match the cell too.
+    representatives = {}
+    for geohash, rank_key, pk, payload in (
+        with_map_payload(
+            queryset.filter(rank_key__in={cell["top_rank_key"] for cell in cells}),
+            org_type,
+        )
+        .order_by("-pk")
+        .values_list("geohash", "rank_key", "id", "payload")
+    ):
+        representatives.setdefault(
+            (geohash[:precision], rank_key), {"id": pk, **payload}
+        )
+
+    return [
+        {
+            "geohash": cell["cell"],
+            "count": cell["count"],
+            "latitude": cell["latitude"],
+            "longitude": cell["longitude"],
+            "organization": representatives.get((cell["cell"], cell["top_rank_key"])),
+        }
+        for cell in cells
+    ]
+
+
+def get_map_cells_key(org_type) -> str:
+    return f"map-cells:{org_type.pk}"
+
+
+def build_map_cells(org_type) -> list[OrganizationMapCell]:
+    """Group the map organizations of the type by cell at every precision."""
+    cells = {}
+    organizations = (
+        Organization.objects.plain()
+        .live()
+        .descendant_of(org_type)
+        .filter(show_on_map=True, latitude__isnull=False)
+        .exclude(geohash="")
+        .order_by("-rank_key", "-pk")
+        .values_list("pk", "geohash", "latitude", "longitude")
+    )
+    for pk, geohash, latitude, longitude in organizations.iterator():
+        for precision in MAP_CELL_PRECISIONS:
+            cell = cells.get(geohash[:precision])
+            if cell is None:
+                # Ranked first, the first organization of a cell is its best.
+                cells[geohash[:precision]] = [precision, 1, latitude, longitude, pk]
+            else:
+                cell[1] += 1
+                cell[2] += latitude
+                cell[3] += longitude
+
+    return [
+        OrganizationMapCell(
+            organization_type=org_type,
+            precision=precision,
+            geohash=geohash,
+            count=count,
+            latitude=latitude_sum / count,
+            longitude=longitude_sum / count,
+            organization_id=pk,
+        )
+        for geohash, (precision, count, latitude_sum, longitude_sum, pk) in (
+            cells.items()
+        )
+    ]
+
+
+def refresh_map_cells(org_type) -> int:
+    """Rebuild the map cells of the type, return the number of cells."""
+    # Read first, a change during the build leaves the cells outdated.
+    version = get_tree_version(org_type.path)
+    cells = build_map_cells(org_type)
+
+    with transaction.atomic():
+        OrganizationMapCell.objects.filter(organization_type=org_type).delete()
+        OrganizationMapCell.objects.bulk_create(cells, batch_size=1000)
+    transaction.on_commit(lambda: cache.set(get_map_cells_key(org_type), version, None))
+    return len(cells)
+
+
+def queue_map_cells(org_type, version: int) -> None:
+    """Rebuild the map cells of the type in the background, once per version."""
+    from catalog.tasks import refresh_organization_map_cells
+
+    if cache.add(f"{get_map_cells_key(org_type)}:{version}", True, MAP_DATA_TIMEOUT):
+        transaction.on_commit(
+            lambda: refresh_organization_map_cells.enqueue(org_type.pk)
+        )
+
+
+def get_precomputed_map_clusters(org_type, bbox, precision: int) -> list | None:
+    """
+    Return the clusters of the precomputed cells inside the snapped box.
+
+    Returns None while the cells of the type are outdated, a rebuild is
+    queued then.
+    """
+    version = get_tree_version(org_type.path)
+    if cache.get(get_map_cells_key(org_type)) != version:
+        queue_map_cells(org_type, version)
+        return None
+
+    south, west, north, east = bbox
+    prefixes = Q()
+    for prefix in bbox_geohashes(*bbox):
+        prefixes |= Q(geohash__startswith=prefix)
+    if west > east:
+        longitude = Q(longitude__gte=west) | Q(longitude__lte=east)
+    else:
+        longitude = Q(longitude__range=(west, east))
+
+    cells = list(
+        OrganizationMapCell.objects.filter(
+            prefixes,
+            longitude,
+            organization_type=org_type,
+            precision=precision,
+            latitude__range=(south, north),
+        ).values("geohash", "count", "latitude", "longitude", "organization_id")
+    )
+    payloads = dict(
+        with_map_payload(
+            Organization.objects.plain().filter(
+                pk__in=[cell["organization_id"] for cell in cells]
+            ),
+            org_type,
+        ).values_list("id", "payload")
+    )
+
+    return [
+        {
+            "geohash": cell["geohash"],
+            "count": cell["count"],
+            "latitude": cell["latitude"],
+            "longitude": cell["longitude"],
+            "organization": (
+                {
+                    "id": cell["organization_id"],
+                    **payloads[cell["organization_id"]],
+                }
+                if cell["organization_id"] in payloads
+                else None
+            ),
+        }
+        for cell in cells
+    ]
+
+
+def get_map_clusters_service(
+    org_type, bbox: tuple, zoom: int, open_now: bool = False
+) -> dict:
+    """
+    Return the organizations of the type inside the (south, west, north,
+    east) box: clusters by geohash cell or, zoomed in, single organizations.
+    With open_now only the organizations open at the moment are returned.
+
+    The box is snapped to the cell grid, so nearby views share the cached
+    response. Both the number of cells and of points are bounded. Clusters
+    are read from the precomputed cells, see refresh_map_cells.
+    """
+    if zoom >= MAP_POINTS_ZOOM:
+        precision = MAP_POINTS_PRECISION
+    else:
+        precision = get_map_precision(zoom, bbox)
+    bbox = snap_bbox(*bbox, precision)
+
+    # The open organizations are cached for the current minute only.
+    minute = minute_of_week(timezone.localtime()) if open_now else None
+    cache_key = "map-clusters:{}:{}:{}:{}:{}:{}:{}".format(
+        org_type.pk,
+        get_language(),
+        get_tree_version(org_type.path),
+        zoom >= MAP_POINTS_ZOOM,
+        precision,
+        ",".join(f"{value:.6f}" for value in bbox),
+        minute,
+    )
+    data = cache.get(cache_key)
+    if data is not None:
+        return data
+
+    queryset = (
+        Organization.objects.plain()
+        .live()
+        .descendant_of(org_type)
+        .filter(show_on_map=True)
+        .in_bbox(*bbox)
+    )
+    if open_now:
+        queryset = queryset.open_now()
+
+    points = None
+    if zoom >= MAP_POINTS_ZOOM:
+        points = get_map_points(queryset, org_type)
+
+    if points is None:
+        if zoom >= MAP_POINTS_ZOOM:
+            # Too many organizations to show one by one even zoomed in.
+            precision = get_map_precision(MAP_POINTS_ZOOM - 1, bbox)
+        clusters = None
+        if not open_now:
+            clusters = get_precomputed_map_clusters(org_type, bbox, precision)
+        if clusters is None:
+            # The open organizations change every minute, they are grouped
+            # on request, like all of them until the cells are rebuilt.
+            clusters = get_map_clusters(queryset, org_type, precision)
+        data = {"precision": precision, "clusters": clusters, "points": []}
+    else:
+        data = {
+            "precision": None,
+            "clusters": [],
+            "points": [
+                {
+                    "id": point["id"],
+                    "latitude": point["latitude"],
+                    "longitude": point["longitude"],
+                    **point["payload"],
+                }
+                for point in points
+            ],
+        }
+
+    cache.set(cache_key, data, 60 if open_now else MAP_DATA_TIMEOUT)
+    return data
 
 
 def get_top_organizations_service(page):
@@ -226,11 +856,53 @@ def get_top_organizations_service(page):
 
 
 def get_latest_organizations_service(parent=None, count=4):
-    """Return latest organizations for."""
+    """Return the cards of the latest organizations."""
     qs = Organization.objects.live().order_by("-first_published_at")
     if parent:
         qs = qs.descendant_of(parent)
-    return qs[:count]
+    return get_organization_cards(qs[:count])
+
+
+# Search radii of the nearest organizations, tried until enough are found.
+NEAREST_RADII_KM = [1, 5, 25, 100, 500]
+NEAREST_MAX_COUNT = 50
+
+
+def get_nearest_organizations_service(
+    lat: float,
+    lon: float,
+    count=10,
+    org_type=None,
+    service_type=None,
+    open_now=False,
+) -> list[Organization]:
+    """
+    Return the nearest live organizations to the point, with their distance
+    in km, optionally of an organization type, with a service type or open
+    at the moment.
+
+    The search ring grows until it holds enough organizations, every ring
+    is a geohash prefix scan, see OrganizationQuerySet.in_bbox. Nothing
+    farther than the largest ring is returned.
+    """
+    count = min(max(count, 1), NEAREST_MAX_COUNT)
+    qs = Organization.objects.plain().live().filter(show_on_map=True)
+    if org_type:
+        qs = qs.listed_in(org_type)
+    if service_type:
+        qs = qs.filter(tagged_items__tag=service_type)
+    if open_now:
+        qs = qs.open_now()
+
+    organizations = []
+    for radius in NEAREST_RADII_KM:
+        organizations = list(
+            qs.within_radius(lat, lon, radius).order_by("distance")[:count]
+        )
+        # Nothing outside the ring is nearer than the organizations inside.
+        if len(organizations) == count:
+            break
+    return organizations
 
 
 def get_paginated_organizations_service(context, parent=None, count=16):
@@ -238,77 +910,51 @@ def get_paginated_organizations_service(context, parent=None, count=16):
     request = context.get("request")
     qs = Organization.objects.live()
     if parent:
-        qs = qs.descendant_of(parent)
-    return paginate(request, qs, count)
+        qs = qs.listed_in(parent)
+    open_now = parse_flag(request.GET.get("open_now"))
+    if open_now:
+        qs = qs.open_now()
+    if "after" in request.GET:
+        page = cursor_paginate(request, qs, count, keys=ORGANIZATION_KEYS)
+    elif open_now:
+        # The open organizations change every minute, their count is not cached.
+        page = paginate(request, qs, count, keys=ORGANIZATION_KEYS)
+    else:
+        count_key = get_count_key(parent, "organizations")
+        page = paginate(
+            request,
+            qs,
+            count,
+            count_key=count_key,
+            # City and category pages link to every page, they count exactly.
+            estimate=ESTIMATE_LISTING_COUNTS and parent is None,
+            keys=ORGANIZATION_KEYS,
+        )
+    page.object_list = get_organization_cards(page.object_list)
+    return page
 
 
-def _to_time(val):
-    if not val:
-        return None
-    if isinstance(val, dtime):
-        return val
-    if isinstance(val, datetime):
-        return val.time()
-    if isinstance(val, str):
-        s = val.strip()
-        for fmt in ("%H:%M", "%H:%M:%S"):
-            try:
-                return datetime.strptime(s, fmt).time()
-            except ValueError:
-                pass
-        # на всякий случай ISO 8601
-        try:
-            return dtime.fromisoformat(s)
-        except ValueError:
-            return None
-    return None
-
-
-def _in_range(now_t: dtime, start_t: dtime | None, end_t: dtime | None) -> bool:
-    if start_t and end_t:
-        if start_t <= end_t:  # обычный интервал, напр. 09:00–18:00
-            return start_t <= now_t <= end_t
-        else:  # через полночь, напр. 22:00–02:00
-            return now_t >= start_t or now_t <= end_t
-    if start_t and not end_t:  # «с ... и до закрытия»
-        return now_t >= start_t
-    if end_t and not start_t:  # «открыто до ...»
-        return now_t <= end_t
-    return False
-
-
-def get_organization_status_service(organization: Organization):
+def get_organization_status_service(organization: Organization, preview=False):
     """Return organization status - 'open', 'closed', 'unknown'."""
-    now = timezone.localtime()
-    now_t = now.time()
-
-    found_today = False
-
-    for block in organization.working_hours:  # type: ignore
-        value = dict(block.value)
-
-        found_today = True
-
-        if value.get("holiday"):
-            return _("Closed")
-
-        start_t = _to_time(value.get("start"))
-        end_t = _to_time(value.get("end"))
-        last_client = bool(value.get("last_client"))
-
-        # 24 часа
-        if start_t == dtime(0, 0) and end_t in (dtime(23, 59), dtime(23, 59, 59)):
+    # The stored schedule is the published one, previews compile the draft.
+    schedule = organization.opening_schedule
+    if preview or not schedule:
+        schedule = organization.get_opening_schedule()
+    interval = find_open_interval(schedule, minute_of_week(timezone.localtime()))
+
+    if interval:
+        start, end, kind = interval
+        if kind == OPEN_24_HOURS:
             return _("Open 24 hours")
-
-        if _in_range(now_t, start_t, end_t):
-            if last_client and (end_t is None or now_t <= end_t):
-                return _("Open until the last client")
-            if end_t:
-                return _("Open until %(time)s") % {
-                    "time": to_12h(end_t.strftime("%H:%M"))
-                }
-            return _("Open")
-
-    if found_today:
+        if kind == OPEN_UNTIL_LAST_CLIENT:
+            return _("Open until the last client")
+        if kind == OPEN_UNTIL:
+            hours, minutes = divmod(end % MINUTES_PER_DAY, 60)
+            return _("Open until %(time)s") % {
+                "time": to_12h(f"{hours:02d}:{minutes:02d}")
+            }
+        return _("Open")
+
+    if schedule.get("days"):
         return _("Closed")
     return _("Unknown")
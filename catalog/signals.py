@@ -0,0 +1,75 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from wagtail.search.signal_handlers import post_save_signal_handler
+from wagtail.signals import page_moved, page_published, page_unpublished
+
+from catalog.models import City, Organization, OrganizationImage
+from catalog.search import deferred_post_save_handler, invalidate_city_index
+from catalog.services import queue_presentation
+from core.cache import bump_tree_versions, context_cache
+from core.renditions import enqueue_renditions
+from subscription.models import PremiumSubscription
+
+# Let bulk imports defer the search index updates, see defer_search_index.
+post_save.disconnect(post_save_signal_handler, sender=Organization)
+post_save.connect(deferred_post_save_handler, sender=Organization)
+
+
+@receiver(page_moved)
+def refresh_keys_after_move(sender, instance, **kwargs):
+    """Identity keys and parent paths depend on the parent path."""
+    organizations = Organization.objects.plain().descendant_of(instance, inclusive=True)
+    Organization.refresh_identity_keys(organizations)
+    Organization.refresh_rank_keys(organizations)
+
+
+@receiver(post_save, sender=PremiumSubscription)
+@receiver(post_delete, sender=PremiumSubscription)
+def refresh_rank_key_after_subscription_change(sender, instance, **kwargs):
+    Organization.refresh_rank_keys(
+        Organization.objects.plain().filter(pk=instance.organization_id)
+    )
+
+
+@receiver(post_save, sender=OrganizationImage)
+@receiver(post_delete, sender=OrganizationImage)
+def refresh_rank_key_after_image_change(sender, instance, **kwargs):
+    Organization.refresh_rank_keys(
+        Organization.objects.plain().filter(pk=instance.page_id)
+    )
+
+
+@receiver(post_save, sender=OrganizationImage)
+@receiver(post_delete, sender=OrganizationImage)
+def bump_tree_versions_after_image_change(sender, instance, **kwargs):
+    """The map data of the organization types links the first images."""
+    path = (
+        Organization.objects.plain()
+        .filter(pk=instance.page_id)
+        .values_list("path", flat=True)
+        .first()
+    )
+    if path:
+        bump_tree_versions(path)
+
+
+@receiver(post_save, sender=OrganizationImage)
+def warm_organization_image_renditions(sender, instance, created, **kwargs):
+    if created:
+        enqueue_renditions("organization-images", [instance.image_id])
+
+
+@receiver(page_published, sender=Organization)
+def precompute_presentation_after_publish(sender, instance, **kwargs):
+    queue_presentation([instance.pk])
+
+
+@receiver(post_save, sender=City)
+@receiver(page_published, sender=City)
+@receiver(page_unpublished, sender=City)
+@receiver(page_moved, sender=City)
+@receiver(post_delete, sender=City)
+def invalidate_city_index_after_change(sender, instance, **kwargs):
+    invalidate_city_index()
+    # The popular cities of the context processor.
+    context_cache.invalidate()
@@ -0,0 +1,100 @@
+from itertools import batched
+
+from django.db.models import F
+from django.utils import timezone, translation
+from django_tasks import task
+
+from catalog import importers
+from catalog.models import ImportJob, ImportJobError, Organization, OrganizationType
+from catalog.search import reindex_queued
+from catalog.services import precompute_presentation, refresh_map_cells
+
+HANDLERS = {
+    ImportJob.Kind.IMPORT: importers.create_organization,
+    ImportJob.Kind.UPDATE: importers.update_organization,
+}
+
+
+def count_rows(job: ImportJob) -> int:
+    """Return the number of rows in the job file."""
+    with job.file.open("rb") as file:
+        return sum(1 for _ in importers.iter_rows(file, job.format))
+
+
+@task()
+def run_import_job(job_id: int):
+    """Apply the rows of an import job, updating its counters after each chunk."""
+    job = ImportJob.objects.get(pk=job_id)
+    if job.status != ImportJob.Status.PENDING:
+        return
+
+    job.status = ImportJob.Status.RUNNING
+    job.started_at = timezone.now()
+    job.save(update_fields=["status", "started_at"])
+
+    handler = HANDLERS[ImportJob.Kind(job.kind)]
+    status, message = ImportJob.Status.FAILED, ""
+
+    try:
+        job.total = count_rows(job)
+        job.save(update_fields=["total"])
+
+        # The admin import page posts to the English URLs.
+        with job.file.open("rb") as file, translation.override("en"):
+            rows = importers.iter_rows(file, job.format)
+            results = importers.import_rows(rows, importers.IMPORT_CHUNK_SIZE, handler)
+
+            for chunk in batched(results, importers.IMPORT_CHUNK_SIZE):
+                errors = [
+                    ImportJobError(
+                        job=job, row=result["row"], message=result["message"]
+                    )
+                    for result in chunk
+                    if not result["success"]
+                ]
+                # Unresolved names do not fail the row but are logged too.
+                warnings = [
+                    ImportJobError(job=job, row=result["row"], message=warning)
+                    for result in chunk
+                    for warning in result.get("warnings", [])
+                ]
+                ImportJobError.objects.bulk_create(errors + warnings)
+                ImportJob.objects.filter(pk=job.pk).update(
+                    processed=F("processed") + len(chunk),
+                    failed=F("failed") + len(errors),
+                )
+        status = ImportJob.Status.FINISHED
+    except Exception as e:
+        message = str(e)
+        raise
+    finally:
+        # Whatever stopped the job, it must not stay running, and the
+        # uploaded file is not kept once it has been read.
+        job.file.delete(save=False)
+        ImportJob.objects.filter(pk=job.pk).update(
+            status=status,
+            message=message,
+            file="",
+            finished_at=timezone.now(),
+        )
+
+
+@task()
+def reindex_queued_organizations():
+    """Update the search index of the organizations queued by bulk writes."""
+    reindex_queued()
+
+
+@task()
+def precompute_organization_presentations(organization_ids: list[int]):
+    """Cache the presentation values of published organizations."""
+    for organization in Organization.objects.plain().filter(pk__in=organization_ids):
+        precompute_presentation(organization)
+
+
+@task()
+def refresh_organization_map_cells(org_type_id: int):
+    """Rebuild the precomputed map cells of an organization type."""
+    org_type = OrganizationType.objects.filter(pk=org_type_id).first()
+    if org_type:
+        refresh_map_cells(org_type)
@@ -1,6 +1,7 @@
 from django import template
 
 from catalog.services import (get_current_city_service, get_latest_organizations_service, get_located_in_service,
+                              get_organization_card_service,
                               get_organization_status_service, get_organizations_count_service,
                               get_paginated_organizations_service, get_phones_service, get_social_networks_service,
                               get_top_organizations_service, get_updated_organizations_count_service,
@@ -9,29 +10,33 @@ from catalog.services import (get_current_city_service, get_latest_organizations
 register = template.Library()
 
 
+def is_preview(context) -> bool:
+    return getattr(context.get("request"), "is_preview", False)
+
+
 @register.simple_tag(takes_context=True)
 def get_current_city(context):
     return get_current_city_service(context)
 
 
-@register.simple_tag
-def get_phones(organization):
-    return get_phones_service(organization)
+@register.simple_tag(takes_context=True)
+def get_phones(context, organization):
+    return get_phones_service(organization, is_preview(context))
 
 
-@register.simple_tag
-def get_website_links(organization):
-    return get_website_links_service(organization)
+@register.simple_tag(takes_context=True)
+def get_website_links(context, organization):
+    return get_website_links_service(organization, is_preview(context))
 
 
-@register.simple_tag
-def get_social_networks(organization):
-    return get_social_networks_service(organization)
+@register.simple_tag(takes_context=True)
+def get_social_networks(context, organization):
+    return get_social_networks_service(organization, is_preview(context))
 
 
-@register.simple_tag
-def get_working_hours(organization):
-    return get_working_hours_service(organization)
+@register.simple_tag(takes_context=True)
+def get_working_hours(context, organization):
+    return get_working_hours_service(organization, is_preview(context))
 
 
 @register.simple_tag
@@ -49,6 +54,11 @@ def get_located_in(organization):
     return get_located_in_service(organization)
 
 
+@register.simple_tag
+def get_organization_card(organization):
+    return get_organization_card_service(organization)
+
+
 @register.simple_tag
 def get_top_organizations(page):
     return get_top_organizations_service(page)
@@ -64,6 +74,6 @@ def get_paginated_organizations(context, parent=None, count=16):
     return get_paginated_organizations_service(context, parent, count)
 
 
-@register.simple_tag
-def get_organization_status(organization):
-    return get_organization_status_service(organization)
+@register.simple_tag(takes_context=True)
+def get_organization_status(context, organization):
+    return get_organization_status_service(organization, is_preview(context))
@@ -0,0 +1,119 @@
+from datetime import UTC, datetime, time
+
+from django.test import SimpleTestCase
+
+from catalog.geo import bbox_geohashes, encode_geohash, parse_ll
+from catalog.utils import (
+    MINUTES_PER_DAY,
+    OPEN_24_HOURS,
+    OPEN_UNTIL,
+    compile_weekly_schedule,
+    find_open_interval,
+    make_rank_key,
+    minute_of_week,
+    split_week_intervals,
+)
+
+
+class RankKeyTests(SimpleTestCase):
+    def rank_key(self, **kwargs):
+        values = {
+            "is_open": True,
+            "subscription_level": None,
+            "rating_weight": 0,
+            "rating_score": 0,
+            "has_images": False,
+            "published_at": datetime(2025, 1, 1, tzinfo=UTC),
+        }
+        values.update(kwargs)
+        return make_rank_key(**values)
+
+    def test_listing_order(self):
+        expected = [
+            self.rank_key(subscription_level=1),
+            self.rank_key(subscription_level=0),
+            self.rank_key(rating_weight=5),
+            self.rank_key(rating_weight=4, rating_score=4.5),
+            self.rank_key(rating_weight=4, rating_score=4.2, has_images=True),
+            self.rank_key(rating_weight=4, rating_score=4.2),
+            self.rank_key(published_at=datetime(2026, 1, 1, tzinfo=UTC)),
+            self.rank_key(),
+            self.rank_key(published_at=None),
+            self.rank_key(is_open=False, subscription_level=2, rating_weight=255),
+        ]
+
+        self.assertEqual(sorted(expected, reverse=True), expected)
+
+
+class WeeklyScheduleTests(SimpleTestCase):
+    def test_overnight_interval(self):
+        schedule = compile_weekly_schedule(
+            [{"day": 1, "start": time(22, 0), "end": time(2, 0)}]
+        )
+
+        self.assertEqual(schedule["intervals"], [[1320, 1560, OPEN_UNTIL]])
+        # Monday 23:00 and Tuesday 01:00 are in the Monday interval.
+        monday = datetime(2025, 6, 2, 23, 0)
+        tuesday = datetime(2025, 6, 3, 1, 0)
+        self.assertIsNotNone(find_open_interval(schedule, minute_of_week(monday)))
+        self.assertIsNotNone(find_open_interval(schedule, minute_of_week(tuesday)))
+        self.assertIsNone(
+            find_open_interval(schedule, minute_of_week(datetime(2025, 6, 3, 3, 0)))
+        )
+
+    def test_sunday_overnight_wraps_the_week(self):
+        schedule = compile_weekly_schedule(
+            [{"day": 7, "start": "22:00", "end": "02:00"}]
+        )
+
+        self.assertEqual(
+            split_week_intervals(schedule["intervals"]),
+            [(9960, 10080), (0, 120)],
+        )
+        monday = datetime(2025, 6, 2, 1, 0)
+        self.assertIsNotNone(find_open_interval(schedule, minute_of_week(monday)))
+
+    def test_open_24_hours(self):
+        schedule = compile_weekly_schedule(
+            [{"day": 3, "start": time(0, 0), "end": time(23, 59)}]
+        )
+
+        self.assertEqual(
+            schedule["intervals"],
+            [[2 * MINUTES_PER_DAY, 3 * MINUTES_PER_DAY, OPEN_24_HOURS]],
+        )
+        wednesday = datetime(2025, 6, 4, 23, 59)
+        self.assertEqual(
+            find_open_interval(schedule, minute_of_week(wednesday))[2], OPEN_24_HOURS
+        )
+
+    def test_holiday(self):
+        schedule = compile_weekly_schedule([{"day": 4, "holiday": True}])
+
+        self.assertEqual(schedule, {"days": [4], "intervals": []})
+
+
+class GeoTests(SimpleTestCase):
+    def test_parse_ll(self):
+        self.assertEqual(parse_ll("59.33, 18.06"), (59.33, 18.06))
+        self.assertEqual(parse_ll("59.33;18.06"), (59.33, 18.06))
+        self.assertEqual(parse_ll("59.33 18.06"), (59.33, 18.06))
+        self.assertIsNone(parse_ll(""))
+        self.assertIsNone(parse_ll("59.33"))
+        self.assertIsNone(parse_ll("north, 18.06"))
+        self.assertIsNone(parse_ll("91, 18.06"))
+
+    def test_bbox_geohashes_cover_the_box(self):
+        prefixes = bbox_geohashes(59.30, 18.00, 59.36, 18.10)
+
+        self.assertLessEqual(len(prefixes), 16)
+        for lat, lon in [(59.30, 18.00), (59.33, 18.06), (59.36, 18.10)]:
+            geohash = encode_geohash(lat, lon)
+            self.assertTrue(any(geohash.startswith(p) for p in prefixes), geohash)
+
+    def test_bbox_geohashes_across_the_antimeridian(self):
+        prefixes = bbox_geohashes(-10.0, 170.0, 10.0, -170.0)
+
+        for lat, lon in [(0.0, 179.5), (0.0, -179.5)]:
+            geohash = encode_geohash(lat, lon)
+            self.assertTrue(any(geohash.startswith(p) for p in prefixes), geohash)
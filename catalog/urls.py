@@ -1,10 +1,15 @@
 from django.urls import path
 
 from .views import (
+    get_map_clusters,
     get_organizations_data,
     import_organization,
+    import_job_status,
+    import_organizations_batch,
+    nearest_organizations,
     organizations,
     search_cities,
+    submit_import_job,
     update_organization,
 )
 
@@ -13,8 +18,21 @@ urlpatterns = [
     path("search-cities/", search_cities, name="search_cities"),
     path("organizations/", organizations, name="organizations"),
     path("import-organization/", import_organization, name="import_organization"),
+    path(
+        "import-organizations/",
+        import_organizations_batch,
+        name="import_organizations_batch",
+    ),
+    path("import-jobs/", submit_import_job, name="submit_import_job"),
+    path("import-jobs/<int:job_id>/", import_job_status, name="import_job_status"),
     path("update-organization/", update_organization, name="update_organization"),
     path(
         "get-organizations-data/", get_organizations_data, name="get_organizations_data"
     ),
+    path("get-map-clusters/", get_map_clusters, name="get_map_clusters"),
+    path(
+        "nearest-organizations/",
+        nearest_organizations,
+        name="nearest_organizations",
+    ),
 ]
@@ -1,5 +1,107 @@
+import hashlib
 import json
 import re
+import unicodedata
+from functools import lru_cache
+
+from core.utils import get_weekday_number
+
+# Distinct hour strings of a feed are few, parsed ones are memoized.
+WORKING_HOURS_CACHE_SIZE = 4096
+
+DOTS_SPACES_RE = re.compile(r"[\.\s]")
+SPACES_RE = re.compile(r"\s")
+TIME_24H_RE = re.compile(r"(\d{1,2}):(\d{2})(?::(\d{2}))?")
+TIME_TOKEN_RE = re.compile(r"(\d{1,2})(?::(\d{1,2}))?(am|pm)?")
+RANGE_SEPARATOR_RE = re.compile(r"\s*[-–]\s*")
+TIME_RANGE_RE = re.compile(
+    r"\d{1,2}(?::\d{2})?\s*(?:a\.?m\.?|p\.?m\.?)?\s*[-–]\s*"
+    r"\d{1,2}(?::\d{2})?\s*(?:a\.?m\.?|p\.?m\.?)?",
+    flags=re.IGNORECASE,
+)
+QUOTED_RE = re.compile(r'"([^"]+)"')
+PUNCTUATION_RE = re.compile(r"[^\w\s]|_")
+
+# Query string values of a set flag, e.g. ?open_now=1.
+FLAG_TRUE_VALUES = {"1", "true", "yes", "on"}
+
+
+def parse_flag(value) -> bool:
+    """Return whether a query string flag is set, "0" and "false" are not."""
+    return str(value).strip().lower() in FLAG_TRUE_VALUES
+
+
+def normalize_identity_part(value: str) -> str:
+    """
+    Normalize a name or an address for duplicate detection.
+
+    Examples:
+        "ACME, Ltd."          -> "acme ltd"
+        "  Main  St. 1 "      -> "main st 1"
+    """
+    value = unicodedata.normalize("NFKC", value or "").casefold()
+    value = PUNCTUATION_RE.sub(" ", value)
+    return " ".join(value.split())
+
+
+# Scandinavian letters without a decomposition into a base letter and a mark.
+FOLDED_LETTERS = str.maketrans({"ø": "o", "æ": "ae", "ð": "d", "þ": "th"})
+
+
+def fold_accents(value: str) -> str:
+    """
+    Casefold a value and strip its accents for prefix search.
+
+    Examples:
+        "Göteborg" -> "goteborg"
+        "Ærø"      -> "aero"
+    """
+    value = unicodedata.normalize("NFKD", (value or "").casefold())
+    value = value.translate(FOLDED_LETTERS)
+    return "".join(char for char in value if not unicodedata.combining(char))
+
+
+def make_identity_key(parent_path: str, legal_name: str, address: str) -> str:
+    """Return the identity hash of an organization under the parent page path.
+
+    Returns an empty string if the legal name or the address is missing.
+    """
+    legal_name = normalize_identity_part(legal_name)
+    address = normalize_identity_part(address)
+    if not legal_name or not address:
+        return ""
+
+    raw = "\n".join([parent_path, legal_name, address])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def make_rank_key(
+    is_open: bool,
+    subscription_level: int | None,
+    rating_weight: int,
+    rating_score,
+    has_images: bool,
+    published_at,
+) -> int:
+    """
+    Pack the listing order of an organization into one integer.
+
+    Sorting by the key descending is the same as sorting by: open first,
+    subscription level (none last), rating weight, rating score, with
+    images first, newest first. Bits, from the highest:
+        open (1), subscription level + 1 (3), rating weight (8),
+        rating score * 100 (10), has images (1), published at epoch (34)
+    """
+    level = 0 if subscription_level is None else subscription_level + 1
+    timestamp = int(published_at.timestamp()) if published_at else 0
+
+    key = int(bool(is_open))
+    key = (key << 3) | min(max(level, 0), 7)
+    key = (key << 8) | min(max(int(rating_weight or 0), 0), 255)
+    key = (key << 10) | min(max(int((rating_score or 0) * 100), 0), 1023)
+    key = (key << 1) | int(bool(has_images))
+    key = (key << 34) | min(max(timestamp, 0), 2**34 - 1)
+    return key
 
 
 def to_12h(time_str: str) -> str:
@@ -16,9 +118,9 @@ def to_12h(time_str: str) -> str:
     if not time_str:
         return ""
 
-    t = re.sub(r"\s", "", time_str)
+    t = SPACES_RE.sub("", time_str)
 
-    m = re.fullmatch(r"(\d{1,2}):(\d{2})(?::(\d{2}))?", t)
+    m = TIME_24H_RE.fullmatch(t)
     if not m:
         raise ValueError("Time must be in HH:MM or HH:MM:SS 24-hour format")
 
@@ -51,7 +153,7 @@ def to_24h(time_str: str) -> str:
     """
 
     # Remove dots and spaces (e.g. "a.m." -> "am")
-    t = re.sub(r"[\.\s]", "", time_str.lower())
+    t = DOTS_SPACES_RE.sub("", time_str.lower())
 
     # Extract am/pm
     ampm = ""
@@ -102,9 +204,9 @@ def normalize_ampm(time_range: str) -> str:
 
     def parse_time_token(token: str) -> dict:
         raw = token
-        token = re.sub(r"[\.\s]", "", token.lower())
+        token = DOTS_SPACES_RE.sub("", token.lower())
 
-        match = re.fullmatch(r"(\d{1,2})(?::(\d{1,2}))?(am|pm)?", token)
+        match = TIME_TOKEN_RE.fullmatch(token)
         if not match:
             raise ValueError(f"Invalid time token: {raw!r}")
 
@@ -160,7 +262,7 @@ def normalize_ampm(time_range: str) -> str:
     def format_time(token: dict) -> str:
         return f"{token['hour']:02d}:{token['minute']:02d}{token['ampm'] or ''}"
 
-    parts = re.split(r"\s*[-–]\s*", time_range.strip(), maxsplit=1)
+    parts = RANGE_SEPARATOR_RE.split(time_range.strip(), maxsplit=1)
     if len(parts) != 2:
         return time_range
 
@@ -194,6 +296,57 @@ def get_start_end_day(time_range: str):
     return get_open_close_time(time_range)
 
 
+@lru_cache(maxsize=WORKING_HOURS_CACHE_SIZE)
+def parse_day_hours(value: str) -> tuple[str | None, str | None, bool]:
+    """
+    Parse the hours of a single day, memoized by the raw string.
+
+    Returns (start, end, holiday) with 24-hour times.
+
+    Examples:
+        "9:00 AM–6:00 PM"  -> ("09:00", "18:00", False)
+        "Open 24 hours"    -> ("00:00", "23:59", False)
+        "Closed"           -> (None, None, True)
+    """
+    special = value.strip().lower()
+    if special == "closed":
+        return None, None, True
+    if special == "open 24 hours":
+        return "00:00", "23:59", False
+
+    start, end = get_open_close_time(value)
+    return start, end, False
+
+
+def build_day_blocks(working_hours: dict) -> list[dict]:
+    """
+    Convert {"Monday": "9:00 AM–6:00 PM", ...} into DayBlock stream data.
+
+    Raises ValueError naming the day whose hours can not be parsed.
+    """
+    days = []
+    for day, hours in working_hours.items():
+        try:
+            start, end, holiday = parse_day_hours(_normalize_day_value(hours))
+        except ValueError:
+            raise ValueError(f"Invalid working hours format for {day}")
+
+        days.append(
+            {
+                "type": "day",
+                "value": {
+                    "day": get_weekday_number(str(day)),
+                    "end": end,
+                    "start": start,
+                    "holiday": holiday,
+                    "last_client": False,
+                },
+            }
+        )
+
+    return days
+
+
 DAY_NAMES = {
     "Monday",
     "Tuesday",
@@ -215,15 +368,7 @@ def _is_special_value(value: str) -> bool:
 
 
 def _is_time_range(value: str) -> bool:
-    value = value.strip()
-    return bool(
-        re.fullmatch(
-            r"\d{1,2}(?::\d{2})?\s*(?:a\.?m\.?|p\.?m\.?)?\s*[-–]\s*"
-            r"\d{1,2}(?::\d{2})?\s*(?:a\.?m\.?|p\.?m\.?)?",
-            value,
-            flags=re.IGNORECASE,
-        )
-    )
+    return bool(TIME_RANGE_RE.fullmatch(value.strip()))
 
 
 def _collapse_intervals(values: list[str]) -> str:
@@ -241,8 +386,8 @@ def _collapse_intervals(values: list[str]) -> str:
     if len(interval_values) != len(values):
         return values[0]
 
-    first_parts = re.split(r"\s*[-–]\s*", interval_values[0], maxsplit=1)
-    last_parts = re.split(r"\s*[-–]\s*", interval_values[-1], maxsplit=1)
+    first_parts = RANGE_SEPARATOR_RE.split(interval_values[0], maxsplit=1)
+    last_parts = RANGE_SEPARATOR_RE.split(interval_values[-1], maxsplit=1)
 
     if len(first_parts) != 2 or len(last_parts) != 2:
         return values[0]
@@ -270,7 +415,7 @@ def _normalize_day_value(value):
 
 
 def _repair_broken_working_hours(raw: str) -> dict:
-    tokens = re.findall(r'"([^"]+)"', raw)
+    tokens = QUOTED_RE.findall(raw)
     if not tokens:
         raise ValueError(f"Could not parse working_hours: {raw!r}")
 
@@ -318,3 +463,104 @@ def parse_working_hours(value: str) -> dict:
     return {
         str(day).strip(): _normalize_day_value(hours) for day, hours in data.items()
     }
+
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+# Kinds of the compiled opening intervals.
+OPEN_24_HOURS = "24h"
+OPEN_UNTIL_LAST_CLIENT = "last_client"
+OPEN_UNTIL = "until"
+OPEN = "open"
+
+
+def _to_minutes(value) -> int | None:
+    """Return the minute of the day of a time or a "HH:MM[:SS]" string."""
+    if value is None or value == "":
+        return None
+    if hasattr(value, "hour"):
+        return value.hour * 60 + value.minute
+    match = TIME_24H_RE.fullmatch(str(value).strip())
+    if not match:
+        return None
+    return int(match.group(1)) * 60 + int(match.group(2))
+
+
+def minute_of_week(value) -> int:
+    """Return the minute of the week of a datetime, Monday 00:00 is 0."""
+    return (value.isoweekday() - 1) * MINUTES_PER_DAY + value.hour * 60 + value.minute
+
+
+def compile_weekly_schedule(days) -> dict:
+    """
+    Compile DayBlock values into minute-of-week opening intervals.
+
+    Returns {"days": [...], "intervals": [[start, end, kind], ...]} where
+    days are the weekdays (1-7) the schedule knows and end is exclusive.
+    Intervals past midnight end on the next day, the Sunday ones may end
+    after MINUTES_PER_WEEK, see split_week_intervals.
+    """
+    known_days = set()
+    intervals = []
+
+    for value in days:
+        try:
+            day = int(value.get("day"))
+        except (TypeError, ValueError):
+            continue
+        if not 1 <= day <= 7:
+            continue
+        known_days.add(day)
+        if value.get("holiday"):
+            continue
+
+        offset = (day - 1) * MINUTES_PER_DAY
+        start = _to_minutes(value.get("start"))
+        end = _to_minutes(value.get("end"))
+        if start is None and end is None:
+            continue
+        # The end minute is inclusive in the editor, 23:59 means midnight.
+        if end == MINUTES_PER_DAY - 1:
+            end = MINUTES_PER_DAY
+
+        if start == 0 and end == MINUTES_PER_DAY:
+            kind = OPEN_24_HOURS
+        elif value.get("last_client"):
+            kind = OPEN_UNTIL_LAST_CLIENT
+        elif end is not None:
+            kind = OPEN_UNTIL
+        else:
+            kind = OPEN
+
+        if start is None:
+            start = 0
+        if end is None:
+            end = MINUTES_PER_DAY
+        elif end <= start:
+            end += MINUTES_PER_DAY
+
+        intervals.append([offset + start, offset + end, kind])
+
+    return {"days": sorted(known_days), "intervals": sorted(intervals)}
+
+
+def split_week_intervals(intervals) -> list[tuple[int, int]]:
+    """Return the (start, end) intervals wrapped into the week."""
+    result = []
+    for start, end, _kind in intervals:
+        if end > MINUTES_PER_WEEK:
+            result.append((start, MINUTES_PER_WEEK))
+            result.append((0, end - MINUTES_PER_WEEK))
+        else:
+            result.append((start, end))
+    return result
+
+
+def find_open_interval(schedule: dict, minute: int) -> list | None:
+    """Return the interval of the compiled schedule open at the minute of week."""
+    for interval in schedule.get("intervals", []):
+        start, end, _kind = interval
+        if start <= minute < end or start <= minute + MINUTES_PER_WEEK < end:
+            return interval
+    return None
@@ -1,14 +1,19 @@
 import json
-from functools import reduce
+import shutil
+import tempfile
 
 import django_filters
 from django.conf import settings
 from django.contrib.auth.decorators import permission_required
-from django.db.models import F, OuterRef, Q, Subquery, Value
-from django.db.models.functions import Coalesce, Concat, JSONObject
-from django.http import Http404, JsonResponse
+from django.core.exceptions import PermissionDenied
+from django.core.files import File
+from django.db import transaction
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.utils.html import strip_tags
+from django.utils.http import http_date, quote_etag
 from django.utils.translation import gettext_lazy as _
 from wagtail.admin.filters import DateRangePickerWidget, WagtailFilterSet
 from wagtail.admin.views.reports import PageReportView
@@ -16,32 +21,34 @@ from wagtail.admin.viewsets.base import ViewSetGroup
 from wagtail.admin.viewsets.chooser import ChooserViewSet
 from wagtail.admin.viewsets.model import ModelViewSet
 from wagtail.admin.viewsets.pages import PageListingViewSet
-from wagtail.images.models import Rendition
 
+from catalog import importers, search
 from catalog.models import (
     City,
+    ImportJob,
     Language,
     Organization,
-    OrganizationImage,
     OrganizationType,
     Reward,
     ServiceType,
     ServiceTypeCategory,
 )
-from catalog.utils import get_start_end_day, to_12h
-from core.models import SiteSettings
-from core.utils import get_weekday_name, get_weekday_number, is_ajax, paginate
+from catalog.services import (
+    get_map_clusters_service,
+    get_map_data_service,
+    get_nearest_organizations_service,
+    get_organization_cards,
+)
+from catalog.tasks import run_import_job
+from catalog.utils import parse_flag, to_12h
+from core.utils import get_count_key, get_weekday_name, is_ajax, paginate
 
 
 def search_cities(request):
     """Used for AJAX city search in header."""
     if request.method == "GET" and is_ajax(request):
-        query = request.GET.get("q", "").strip().lower()
-        cities = (
-            City.objects.live().filter(title__istartswith=query).order_by("title")[:20]
-        )
-        cities = map(lambda city: {"url": city.url, "title": city.title}, cities)
-        return JsonResponse(list(cities), safe=False)
+        cities = search.search_cities(request.GET.get("q", ""))
+        return JsonResponse(cities, safe=False)
     raise Http404
 
 
@@ -61,7 +68,10 @@ def organizations(request):
 
     organizations = Organization.objects.live().filter(**filters)
 
-    organizations = paginate(request, organizations, 20)
+    # Free-text filters would fill the cache with one-off keys.
+    count_key = None if filters else get_count_key(None, "organizations")
+    organizations = paginate(request, organizations, 20, count_key=count_key)
+    organizations.object_list = get_organization_cards(organizations.object_list)
 
     context = {"organizations": organizations}
     return render(request, "catalog/organizations.html", context)
@@ -162,227 +172,69 @@ def import_organization(request):
     except json.JSONDecodeError:
         return JsonResponse({"message": "Invalid JSON"}, status=400)
 
-    data_fields = data.keys()
+    handler = importers.create_organization
+    if request.GET.get("mode") == "upsert":
+        # Upserts update existing organizations as well.
+        if not request.user.has_perm("catalog.edit_organization"):
+            raise PermissionDenied
+        handler = importers.upsert_organization
 
-    try:
-        parent_id = data.get("parent_id")
-        parent = OrganizationType.objects.get(id=int(parent_id))
-    except (ValueError, OrganizationType.DoesNotExist):
-        return JsonResponse(
-            {"success": False, "message": "Invalid parent ID"}, status=400
-        )
+    dry_run = request.GET.get("dry_run") in importers.TRUE_VALUES
 
-    # Check if Organization with this parent and legal name and address already exists
-    legal_name = data.get("legal_name", "").strip()
-    address = data.get("address_en", "").strip()
-    if not legal_name:
-        return JsonResponse(
-            {"success": False, "message": "Legal name is required"}, status=400
-        )
-    if not address:
-        return JsonResponse(
-            {"success": False, "message": "AddressEn is required"}, status=400
-        )
-    if (
-        Organization.objects.filter(
-            legal_name__iexact=legal_name, address__iexact=address
-        )
-        .descendant_of(parent)
-        .exists()
-    ):
-        return JsonResponse(
-            {
-                "success": False,
-                "message": "Already exists!",
-            },
-            status=400,
-        )
+    try:
+        # Indexed like the batches, in one bulk call after the commit.
+        with search.defer_search_index(), transaction.atomic():
+            organization, info = handler(data, dry_run=dry_run)
+    except importers.ImportRowError as e:
+        return JsonResponse({"success": False, "message": e.message}, status=e.status)
+    except Exception as e:
+        return JsonResponse({"success": False, "message": str(e)}, status=500)
 
-    awailable_fields = [
-        "slug",
-        "tin",
-        "legal_name",
-        "plus_code",
-        "working_hours",
-        "verified",
-        "temporarily_closed",
-        "languages",
-        "ll",
-        "show_on_map",
-        "located_in",
-        "service_types",
-        "phones",
-        "social_networks",
-        "website_links",
-    ]
+    return JsonResponse(
+        {"success": True, "id": organization.pk, "dry_run": dry_run, **info},
+        status=200,
+    )
 
-    i18n_awailable_fields = [
-        "title",
-        "h1_title",
-        "seo_title",
-        "search_description",
-        "description",
-        "address",
-        "how_to_arrive",
-    ]
 
-    awailable_locales = settings.MODELTRANSLATION_LANGUAGES
+@transaction.non_atomic_requests
+@permission_required("catalog.add_organization")
+def import_organizations_batch(request):
+    """Import a streamed NDJSON or CSV body, one result line per row."""
+    if not request.method == "POST":
+        raise Http404
 
-    for field in i18n_awailable_fields:
-        for locale in awailable_locales:
-            localized_field = f"{field}_{locale}"
-            awailable_fields.append(localized_field)
-
-    awailable_fields += i18n_awailable_fields
-
-    new_organization = Organization()
-
-    for field in data_fields:
-        if field not in awailable_fields:
-            continue
-
-        # Get field type, ex: 'CharField', 'BooleanField', etc.
-        field_type = new_organization._meta.get_field(field).get_internal_type()
-
-        if field_type == "CharField":
-            setattr(new_organization, field, data[field])
-        elif field_type == "SlugField":
-            slug = data[field].strip()
-            if slug:
-                setattr(new_organization, field, slug)
-        elif (
-            field_type == "TextField"
-            and "search" not in field
-            and "website" not in field
-            and "social" not in field
-        ):
-            # Make paragraphs from text
-            text = data[field].split("\n\n")
-            text = "<p>" + "</p><p>".join(text) + "</p>"
-            setattr(new_organization, field, text)
-        elif field_type == "TextField":
-            setattr(new_organization, field, data[field])
-        elif field_type == "BooleanField":
-            setattr(
-                new_organization,
-                field,
-                data[field] in [True, "true", "True", 1, "yes", "on", "Yes", "On"],
-            )
-        elif field == "working_hours":
-            if data[field]:
-                wh = json.loads(data[field])
-                days = []
-                for day in wh:
-                    if wh[day].lower() == "closed":
-                        days.append(
-                            {
-                                "type": "day",
-                                "value": {
-                                    "day": get_weekday_number(day),
-                                    "end": None,
-                                    "start": None,
-                                    "holiday": True,
-                                    "last_client": False,
-                                },
-                            }
-                        )
-                    elif wh[day].lower() == "open 24 hours":
-                        days.append(
-                            {
-                                "type": "day",
-                                "value": {
-                                    "day": get_weekday_number(day),
-                                    "end": "23:59",
-                                    "start": "00:00",
-                                    "holiday": False,
-                                    "last_client": False,
-                                },
-                            }
-                        )
-                    else:
-                        try:
-                            start, end = get_start_end_day(wh[day])
-                        except ValueError:
-                            return JsonResponse(
-                                {
-                                    "success": False,
-                                    "message": f"Invalid working hours format for {day}",
-                                },
-                                status=400,
-                            )
-
-                        days.append(
-                            {
-                                "type": "day",
-                                "value": {
-                                    "day": get_weekday_number(day),
-                                    "end": end,
-                                    "start": start,
-                                    "holiday": False,
-                                },
-                            }
-                        )
-
-                new_organization.working_hours = days
-        elif field == "located_in":
-            located_in = data.get(field, "")
-            if located_in:
-                try:
-                    located_in = int(located_in)
-                    new_organization.located_in = Organization.objects.get(
-                        id=located_in
-                    )
-                except (ValueError, Organization.DoesNotExist):
-                    return JsonResponse(
-                        {"success": False, "message": "Invalid located_in ID"},
-                        status=400,
-                    )
+    format = "csv" if "csv" in request.content_type else "ndjson"
 
     try:
-        parent.numchild = parent.get_children().count()
-        parent.add_child(instance=new_organization)
-        parent.numchild += 1
-        parent.save()
-        new_organization.save_revision().publish()
-
-        if "service_types" in data_fields:
-            sts = []
-            for st in data["service_types"].split(","):
-                names = []
-                for locale in awailable_locales:
-                    field_name = f"name_{locale}__iexact"
-                    names.append(Q(**{field_name: st.strip()}))
-
-                try:
-                    sts.append(
-                        ServiceType.objects.get(reduce(lambda x, y: x | y, names))
-                    )
-                except ServiceType.DoesNotExist:
-                    continue
-
-                if sts:
-                    new_organization.service_types.set(sts)
-                    new_organization.save_revision().publish()
-
-        if "languages" in data_fields:
-            langs = []
-            for lang in data["languages"].split(","):
-                try:
-                    language_obj = Language.objects.get(
-                        language_name__iexact=lang.strip()
-                    )
-                    langs.append(language_obj)
-                except Language.DoesNotExist:
-                    continue
-
-            if langs:
-                new_organization.languages.set(langs)
-                new_organization.save_revision().publish()
-
-    except Exception as e:
-        return JsonResponse({"success": False, "message": str(e)}, status=500)
+        chunk_size = int(request.GET.get("chunk_size", importers.IMPORT_CHUNK_SIZE))
+    except ValueError:
+        return JsonResponse({"message": "Invalid chunk size"}, status=400)
+
+    mode = request.GET.get("mode")
+    rows = importers.iter_rows(request, format)
+
+    handler = importers.create_organization
+    if mode == "upsert":
+        if not request.user.has_perm("catalog.edit_organization"):
+            raise PermissionDenied
+        handler = importers.upsert_organization
+
+    if mode == "validate":
+        results = importers.mark_duplicates(
+            importers.validate_rows(rows, max(chunk_size, 1))
+        )
+    else:
+        results = importers.import_rows(
+            rows,
+            max(chunk_size, 1),
+            handler,
+            dry_run=request.GET.get("dry_run") in importers.TRUE_VALUES,
+        )
 
-    return JsonResponse({"success": True}, status=200)
+    return StreamingHttpResponse(
+        (json.dumps(result) + "\n" for result in results),
+        content_type="application/x-ndjson",
+    )
 
 
 @permission_required("catalog.edit_organization")
@@ -395,198 +247,94 @@ def update_organization(request):
     except json.JSONDecodeError:
         return JsonResponse({"message": "Invalid JSON"}, status=400)
 
-    data_fields = data.keys()
+    dry_run = request.GET.get("dry_run") in importers.TRUE_VALUES
 
-    id = data.get("id")
-    if not id:
-        return JsonResponse({"success": False, "message": "ID is required"}, status=400)
+    try:
+        with search.defer_search_index(), transaction.atomic():
+            organization, info = importers.update_organization(data, dry_run=dry_run)
+    except importers.ImportRowError as e:
+        return JsonResponse({"success": False, "message": e.message}, status=e.status)
+    except Exception as e:
+        return JsonResponse({"success": False, "message": str(e)}, status=500)
 
-    awailable_fields = [
-        "slug",
-        "tin",
-        "legal_name",
-        "plus_code",
-        "working_hours",
-        "verified",
-        "temporarily_closed",
-        "languages",
-        "ll",
-        "show_on_map",
-        "located_in",
-        "service_types",
-        "phones",
-        "social_networks",
-        "website_links",
-    ]
+    return JsonResponse(
+        {"success": True, "id": organization.pk, "dry_run": dry_run, **info},
+        status=200,
+    )
 
-    i18n_awailable_fields = [
-        "title",
-        "h1_title",
-        "seo_title",
-        "search_description",
-        "description",
-        "address",
-        "how_to_arrive",
-    ]
 
-    awailable_locales = settings.MODELTRANSLATION_LANGUAGES
+IMPORT_JOB_PERMISSIONS = {
+    ImportJob.Kind.IMPORT: "catalog.add_organization",
+    ImportJob.Kind.UPDATE: "catalog.edit_organization",
+}
 
-    for field in i18n_awailable_fields:
-        for locale in awailable_locales:
-            localized_field = f"{field}_{locale}"
-            awailable_fields.append(localized_field)
 
-    awailable_fields += i18n_awailable_fields
+def submit_import_job(request):
+    """Store an uploaded NDJSON/CSV file and run it as a background job."""
+    if not request.method == "POST":
+        raise Http404
 
-    try:
-        organization = Organization.objects.get(id=id)
-    except Organization.DoesNotExist:
-        return JsonResponse(
-            {"success": False, "message": "Organization not found"}, status=404
-        )
+    kind = request.GET.get("kind", ImportJob.Kind.IMPORT)
+    if kind not in ImportJob.Kind.values:
+        return JsonResponse({"success": False, "message": "Invalid kind"}, status=400)
 
-    for field in data_fields:
-        if field not in awailable_fields:
-            continue
-
-        # Get field type, ex: 'CharField', 'BooleanField', etc.
-        field_type = organization._meta.get_field(field).get_internal_type()
-
-        if field_type == "CharField":
-            setattr(organization, field, data[field])
-        elif field_type == "SlugField":
-            slug = data[field].strip()
-            if slug:
-                setattr(organization, field, slug)
-        elif (
-            field_type == "TextField"
-            and "search" not in field
-            and "website" not in field
-            and "social" not in field
-        ):
-            # Make paragraphs from text
-            text = data[field].split("\n\n")
-            text = "<p>" + "</p><p>".join(text) + "</p>"
-            setattr(organization, field, text)
-        elif field_type == "TextField":
-            setattr(organization, field, data[field])
-        elif field_type == "BooleanField":
-            setattr(
-                organization,
-                field,
-                data[field] in [True, "true", "True", 1, "yes", "on", "Yes", "On"],
-            )
-        elif field == "working_hours":
-            if data[field]:
-                wh = json.loads(data[field])
-                days = []
-                for day in wh:
-                    if wh[day].lower() == "closed":
-                        days.append(
-                            {
-                                "type": "day",
-                                "value": {
-                                    "day": get_weekday_number(day),
-                                    "end": None,
-                                    "start": None,
-                                    "holiday": True,
-                                    "last_client": False,
-                                },
-                            }
-                        )
-                    elif wh[day].lower() == "open 24 hours":
-                        days.append(
-                            {
-                                "type": "day",
-                                "value": {
-                                    "day": get_weekday_number(day),
-                                    "end": "23:59",
-                                    "start": "00:00",
-                                    "holiday": False,
-                                    "last_client": False,
-                                },
-                            }
-                        )
-                    else:
-                        try:
-                            start, end = get_start_end_day(wh[day])
-                        except ValueError:
-                            return JsonResponse(
-                                {
-                                    "success": False,
-                                    "message": f"Invalid working hours format for {day}",
-                                },
-                                status=400,
-                            )
-
-                        days.append(
-                            {
-                                "type": "day",
-                                "value": {
-                                    "day": get_weekday_number(day),
-                                    "end": end,
-                                    "start": start,
-                                    "holiday": False,
-                                },
-                            }
-                        )
-
-                organization.working_hours = days
-
-        elif field == "located_in":
-            located_in = data.get(field, "")
-            if located_in:
-                try:
-                    located_in = int(located_in)
-                    organization.located_in = Organization.objects.get(id=located_in)
-                except (ValueError, Organization.DoesNotExist):
-                    return JsonResponse(
-                        {"success": False, "message": "Invalid located_in ID"},
-                        status=400,
-                    )
+    if not request.user.has_perm(IMPORT_JOB_PERMISSIONS[kind]):
+        raise PermissionDenied
 
-    try:
-        if "service_types" in data_fields:
-            sts = []
-            for st in data["service_types"].split(","):
-                names = []
-                for locale in awailable_locales:
-                    field_name = f"name_{locale}__iexact"
-                    names.append(Q(**{field_name: st.strip()}))
-
-                try:
-                    sts.append(
-                        ServiceType.objects.get(reduce(lambda x, y: x | y, names))
-                    )
-                except ServiceType.DoesNotExist:
-                    continue
-
-                if sts:
-                    organization.service_types.set(sts)
-
-        if "languages" in data_fields:
-            langs = []
-            for lang in data["languages"].split(","):
-                try:
-                    language_obj = Language.objects.get(
-                        language_name__iexact=lang.strip()
-                    )
-                    langs.append(language_obj)
-                except Language.DoesNotExist:
-                    continue
-
-            if langs:
-                organization.languages.set(langs)
+    upload = request.FILES.get("file")
+    if upload:
+        format = "csv" if upload.name.lower().endswith(".csv") else "ndjson"
+    else:
+        # Raw body: copy the stream to a temporary file instead of loading it.
+        format = "csv" if "csv" in request.content_type else "ndjson"
+        upload = tempfile.TemporaryFile()
+        shutil.copyfileobj(request, upload)
+        upload.seek(0)
+
+    job = ImportJob(kind=kind, format=format, user=request.user)
+    job.file.save(f"{kind}.{format}", File(upload), save=False)
+    job.save()
+
+    transaction.on_commit(lambda: run_import_job.enqueue(job.pk))
+
+    return JsonResponse(
+        {
+            "success": True,
+            "job_id": job.pk,
+            "status_url": reverse("catalog:import_job_status", args=[job.pk]),
+        }
+    )
 
-    except Exception as e:
-        return JsonResponse({"success": False, "message": str(e)}, status=500)
 
+def import_job_status(request, job_id):
+    """Return the progress and the first row errors of an import job."""
     try:
-        organization.save_revision().publish()
-    except Exception as e:
-        return JsonResponse({"success": False, "message": str(e)}, status=500)
+        job = ImportJob.objects.get(pk=job_id)
+    except ImportJob.DoesNotExist:
+        raise Http404
 
-    return JsonResponse({"success": True}, status=200)
+    if not request.user.has_perm(IMPORT_JOB_PERMISSIONS[ImportJob.Kind(job.kind)]):
+        raise PermissionDenied
+
+    try:
+        offset = max(int(request.GET.get("errors_offset", 0)), 0)
+    except ValueError:
+        offset = 0
+
+    errors = job.errors.all()[offset : offset + 100]  # type: ignore
+
+    return JsonResponse(
+        {
+            "id": job.pk,
+            "kind": job.kind,
+            "status": job.status,
+            "total": job.total,
+            "processed": job.processed,
+            "failed": job.failed,
+            "message": job.message,
+            "errors": [{"row": e.row, "message": e.message} for e in errors],
+        }
+    )
 
 
 class OrganizationReportFilters(WagtailFilterSet):
@@ -745,7 +493,7 @@ class OrganizationReportView(PageReportView):
 
 
 def get_organizations_data(request):
-    """Возвращает данные организаций для заданного типа организаций — без Python-цикла."""
+    """Возвращает данные организаций для заданного типа организаций из кэша, с ETag."""
 
     if request.method == "GET" and is_ajax(request):
         org_type_id = request.GET.get("org_type_id", "").strip()
@@ -755,57 +503,107 @@ def get_organizations_data(request):
         except (ValueError, OrganizationType.DoesNotExist):
             return JsonResponse({"message": "Invalid organization type ID"}, status=400)
 
-        org_type_url = org_type.url
+        data = get_map_data_service(org_type)
+        etag = quote_etag(data["etag"])
 
-        # --- Подзапрос: находим ID первого изображения организации ---
-        first_image_id_sq = (
-            OrganizationImage.objects.filter(page_id=OuterRef("pk"))
-            .order_by("sort_order")
-            .values("image_id")[:1]
+        response = get_conditional_response(
+            request, etag=etag, last_modified=data["last_modified"]
         )
+        if response is None:
+            response = HttpResponse(data["content"], content_type="application/json")
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(data["last_modified"])
+        # Browsers revalidate on every map load and get a 304 while unchanged.
+        patch_cache_control(response, no_cache=True)
+        return response
 
-        # --- Подзапрос: рендер с шириной 720 ---
-        rendition_file_sq = Rendition.objects.filter(
-            image_id=Subquery(first_image_id_sq), filter_spec="width-720"
-        ).values("file")[:1]
+    raise Http404
 
-        # --- Подзапрос: оригинальный файл (если rendition нет) ---
-        original_file_sq = (
-            OrganizationImage.objects.filter(page_id=OuterRef("pk"))
-            .order_by("sort_order")
-            .values("image__file")[:1]
-        )
 
-        default_image = SiteSettings.default_organization_image
+def nearest_organizations(request):
+    """Return the organizations nearest to lat/lon.
 
-        # --- Итоговый URL картинки (Coalesce выбирает первый доступный вариант) ---
-        image_file_sq = Coalesce(
-            Subquery(rendition_file_sq),
-            Subquery(original_file_sq),
-            default_image.get_queryset().values("file")[:1],
-        )
-        image_url_expr = Concat(Value(settings.MEDIA_URL), image_file_sq)
-
-        # --- Основной queryset ---
-        qs = (
-            Organization.objects.live()
-            .descendant_of(org_type)
-            .annotate(
-                image_url=image_url_expr,
-                payload=JSONObject(
-                    title=F("title"),
-                    rating=F("avg_rating"),
-                    ll=F("ll"),
-                    url=Concat(Value(org_type_url), F("slug"), Value("/")),
-                    image=F("image_url"),
-                ),
+    Optional parameters: count, org_type_id, service_type and open_now.
+    """
+    if request.method != "GET":
+        raise Http404
+
+    try:
+        lat = float(request.GET.get("lat", ""))
+        lon = float(request.GET.get("lon", ""))
+        count = int(request.GET.get("count", 10))
+    except ValueError:
+        return JsonResponse({"message": "Invalid coordinates or count"}, status=400)
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return JsonResponse({"message": "Invalid coordinates or count"}, status=400)
+
+    org_type = None
+    if request.GET.get("org_type_id"):
+        try:
+            org_type = OrganizationType.objects.get(id=int(request.GET["org_type_id"]))
+        except (ValueError, OrganizationType.DoesNotExist):
+            return JsonResponse({"message": "Invalid organization type ID"}, status=400)
+
+    service_type = None
+    if request.GET.get("service_type"):
+        try:
+            service_type = ServiceType.objects.get(pk=int(request.GET["service_type"]))
+        except (ValueError, ServiceType.DoesNotExist):
+            return JsonResponse({"message": "Invalid service type"}, status=400)
+
+    organizations = get_nearest_organizations_service(
+        lat,
+        lon,
+        count,
+        org_type=org_type,
+        service_type=service_type,
+        open_now=parse_flag(request.GET.get("open_now")),
+    )
+    data = [
+        {
+            "id": organization.pk,
+            "title": organization.title,
+            "url": organization.url,
+            "address": organization.address,
+            "rating": organization.avg_rating,
+            "latitude": organization.latitude,
+            "longitude": organization.longitude,
+            "distance": round(organization.distance, 3),
+        }
+        for organization in organizations
+    ]
+    return JsonResponse(data, safe=False)
+
+
+def get_map_clusters(request):
+    """Return clustered organizations of a type inside the map bounding box.
+
+    Expects org_type_id, bbox=south,west,north,east and zoom, optionally open_now.
+    """
+    if request.method == "GET" and is_ajax(request):
+        try:
+            org_type = OrganizationType.objects.get(
+                id=int(request.GET.get("org_type_id", "").strip())
             )
-            .values_list("id", "payload")
-        )
+        except (ValueError, OrganizationType.DoesNotExist):
+            return JsonResponse({"message": "Invalid organization type ID"}, status=400)
 
-        # --- Преобразуем QuerySet в dict ---
-        data = {str(pk): obj for pk, obj in qs}
+        try:
+            bbox = tuple(float(v) for v in request.GET.get("bbox", "").split(","))
+            zoom = int(request.GET.get("zoom", ""))
+        except ValueError:
+            return JsonResponse({"message": "Invalid bbox or zoom"}, status=400)
+
+        south, west, north, east = bbox if len(bbox) == 4 else (None,) * 4
+        if (
+            south is None
+            or not -90 <= south <= north <= 90
+            or not -180 <= west <= 180
+            or not -180 <= east <= 180
+        ):
+            return JsonResponse({"message": "Invalid bbox or zoom"}, status=400)
 
-        return JsonResponse(data, safe=False)
+        open_now = parse_flag(request.GET.get("open_now"))
+        return JsonResponse(get_map_clusters_service(org_type, bbox, zoom, open_now))
 
     raise Http404
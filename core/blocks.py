@@ -400,6 +400,13 @@ class SectionCardsBlock(StructBlock):
         label=_("Cards"),
     )
 
+    def get_context(self, value, parent_context=None):
+        from catalog.services import get_stream_organization_cards
+
+        context = super().get_context(value, parent_context=parent_context)
+        context["organization_cards"] = get_stream_organization_cards(value["cards"])
+        return context
+
     class Meta:
         template = "core/blocks/section_cards_block.html"
         label = _("Section with cards")
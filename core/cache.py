@@ -0,0 +1,111 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.connection import ConnectionProxy
+
+# Version stamps never expire, only eviction can drop them.
+VERSION_TIMEOUT = None
+
+# Version stamps and precomputed values, see the "persistent" cache setting.
+persistent_cache = ConnectionProxy(caches, "persistent")
+
+TREE_NAMESPACE = "tree"
+TREE_STEPLEN = 4
+
+# Set inside suppress_tree_versions.
+_tree_versions_suppressed: ContextVar[bool] = ContextVar(
+    "tree_versions_suppressed", default=False
+)
+
+
+def _version_key(namespace: str, key: str) -> str:
+    return f"version:{namespace}:{key}"
+
+
+def get_version(namespace: str, key: str = "") -> int:
+    """Return the current version stamp of a key, creating it if missing."""
+    cache_key = _version_key(namespace, key)
+    version = persistent_cache.get(cache_key)
+    if version is None:
+        # A fresh stamp never repeats one evicted from the cache before.
+        version = time.time_ns()
+        if not persistent_cache.add(cache_key, version, VERSION_TIMEOUT):
+            version = persistent_cache.get(cache_key, version)
+    return version
+
+
+def bump_version(namespace: str, key: str = "") -> None:
+    """Invalidate everything cached under the current version of a key."""
+    # Not incr(), which re-sets the key with the default timeout on some
+    # backends, e.g. the file based one, and lets the stamp expire.
+    persistent_cache.set(_version_key(namespace, key), time.time_ns(), VERSION_TIMEOUT)
+
+
+def get_tree_version(path: str = "") -> int:
+    """Return the version stamp of the page subtree at the path."""
+    return get_version(TREE_NAMESPACE, path)
+
+
+def bump_tree_versions(path: str) -> None:
+    """Bump the versions of the page at the path and of all its ancestors.
+
+    The empty path stands for the whole site.
+    """
+    if _tree_versions_suppressed.get():
+        return
+    bump_version(TREE_NAMESPACE, "")
+    for end in range(TREE_STEPLEN, len(path) + 1, TREE_STEPLEN):
+        bump_version(TREE_NAMESPACE, path[:end])
+
+
+@contextmanager
+def suppress_tree_versions():
+    """Skip the tree version bumps in the block, e.g. of bulk publishing.
+
+    The caller bumps the versions of the changed subtree once afterwards.
+    """
+    token = _tree_versions_suppressed.set(True)
+    try:
+        yield
+    finally:
+        _tree_versions_suppressed.reset(token)
+
+
+class LocalCache:
+    """
+    Values kept in the memory of the process until the version stamp of the
+    namespace changes, see bump_version.
+
+    Every lookup reads the version from the shared cache once, so all
+    processes drop their values after a bump.
+    """
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self.version = None
+        self.values = {}
+
+    def get(self, key, build):
+        """Return the value of the key, calling build() when it is missing."""
+        version = get_version(self.namespace)
+        if version != self.version:
+            self.values = {}
+            self.version = version
+
+        values = self.values
+        if key not in values:
+            # Built outside the dict, a concurrent bump drops the whole dict.
+            values[key] = build()
+        return values[key]
+
+    def invalidate(self):
+        """Drop the values in every process once the transaction commits."""
+        # A bump before the commit would let a process rebuild from old rows.
+        transaction.on_commit(lambda: bump_version(self.namespace))
+
+
+# Site-wide template context values, see the context processors.
+context_cache = LocalCache("context")
@@ -1,32 +1,27 @@
-from functools import lru_cache
-
 from django.conf import settings
 
+from core.cache import context_cache
 from core.models import Footer
 
 
-@lru_cache()
-def footer(request):
-    context = {"footer": None}
-
+def get_footer():
     footer = Footer.objects.first()  # type: ignore
     if not footer:
         footer = Footer()
         footer.save()
+    return footer
 
-    context["footer"] = footer  # type: ignore
 
-    return context
+def footer(request):
+    return {"footer": context_cache.get("footer", get_footer)}
 
 
-@lru_cache()
 def api_keys(request):
     return {
         "GOOGLE_MAPS_API_KEY": settings.GOOGLE_MAPS_API_KEY,
     }
 
 
-@lru_cache()
 def base_settings(request):
     return {
         "DEFAULT_LAT_LNG": settings.DEFAULT_LAT_LNG,
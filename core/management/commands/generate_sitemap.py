@@ -182,7 +182,10 @@ def _run_job(args: tuple[Job, str, list[str], int]) -> list[str]:
     default_lang = dj_settings.LANGUAGE_CODE
 
     model = dj_apps.get_model(job.model_path)
-    base_qs = model.objects.live().exclude(depth=1).order_by("id")
+    # Менеджеры с тяжелой сортировкой (catalog.Organization) дают plain().
+    manager = model.objects
+    base_qs = manager.plain() if hasattr(manager, "plain") else manager.all()
+    base_qs = base_qs.live().exclude(depth=1).order_by("id")
 
     total = base_qs.count()
     if not total:
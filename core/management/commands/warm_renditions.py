@@ -0,0 +1,102 @@
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import batched
+
+from django.core.management.base import BaseCommand, CommandError
+
+CHUNK_SIZE = 50
+
+
+def _init_worker():
+    # Django must be set up in a spawned process before the models are imported.
+    import django
+
+    django.setup()
+
+
+def _warm_chunk(chunk: list[tuple[int, list[str]]]) -> tuple[int, int, int, int]:
+    """Generate the missing renditions of a chunk of images in a worker process."""
+    from core.renditions import warm_renditions
+
+    generated, existing, failed = warm_renditions(dict(chunk))
+    return len(chunk), generated, existing, failed
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates the missing renditions of the registered image usages, "
+        "so that the first page views do not render them in the request."
+    )
+
+    def add_arguments(self, parser):
+        # Imported here, spawned workers import this module before Django is set up.
+        from core.renditions import RENDITION_USAGES
+
+        parser.add_argument(
+            "--usage",
+            action="append",
+            choices=sorted(RENDITION_USAGES),
+            help="Image usage to warm up, may be repeated. All usages by default.",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=mp.cpu_count(),
+            help="Number of worker processes (1 = no pool).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help="Number of images sent to a worker at once.",
+        )
+
+    def handle(self, *args, **options):
+        from core.renditions import RENDITION_USAGES, collect_images
+
+        usages = options["usage"] or sorted(RENDITION_USAGES)
+        if not usages:
+            raise CommandError("No image usages are registered.")
+
+        processes = max(options["processes"], 1)
+        chunk_size = max(options["chunk_size"], 1)
+
+        images = collect_images(usages)
+        total = len(images)
+        self.stdout.write(f"Images: {total}, usages: {', '.join(usages)}")
+
+        chunks = [
+            [(image_id, sorted(specs)) for image_id, specs in chunk]
+            for chunk in batched(sorted(images.items()), chunk_size)
+        ]
+
+        self.done = self.generated = self.existing = self.failed = 0
+
+        if processes == 1:
+            for chunk in chunks:
+                self.report(*_warm_chunk(chunk), total)
+        else:
+            ctx = mp.get_context("spawn")
+            with ProcessPoolExecutor(
+                max_workers=processes, mp_context=ctx, initializer=_init_worker
+            ) as executor:
+                futures = [executor.submit(_warm_chunk, chunk) for chunk in chunks]
+                for future in as_completed(futures):
+                    self.report(*future.result(), total)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated: {self.generated}, existing: {self.existing}, "
+                f"failed: {self.failed}"
+            )
+        )
+
+    def report(self, images, generated, existing, failed, total):
+        self.done += images
+        self.generated += generated
+        self.existing += existing
+        self.failed += failed
+        self.stdout.write(
+            f"{self.done}/{total} images, {self.generated} generated, "
+            f"{self.existing} existing, {self.failed} failed"
+        )
@@ -19,6 +19,7 @@ from wagtail.contrib.settings.models import (
 from wagtail.fields import StreamField
 
 from core.blocks import BannerBlock, CardStyle5Block, ExternalCodeBlock, LinkBlock
+from core.cache import context_cache
 
 
 @register_setting
@@ -135,7 +136,10 @@ class SiteSettings(BaseGenericSetting):
                 key = make_template_fragment_key(key, [language])
                 cache.delete(key)
 
-        return super().save(*args, **kwargs)
+        result = super().save(*args, **kwargs)
+        # After the save, outside a transaction the drop happens right away.
+        context_cache.invalidate()
+        return result
 
 
 @register_setting
@@ -307,4 +311,7 @@ class Footer(models.Model):
             key = make_template_fragment_key("footer", [language])
             cache.delete(key)
 
-        return super().save(*args, **kwargs)
+        result = super().save(*args, **kwargs)
+        # After the save, outside a transaction the drop happens right away.
+        context_cache.invalidate()
+        return result
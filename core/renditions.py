@@ -0,0 +1,85 @@
+from django.apps import apps
+from django.db import transaction
+from wagtail.images import get_image_model
+from wagtail.images.models import Filter
+
+# Usage name -> (model label, image field, filter specs). Apps register the
+# renditions their templates render, see register_renditions.
+RENDITION_USAGES: dict[str, tuple[str, str, list[str]]] = {}
+
+
+def register_renditions(usage: str, model: str, field: str, specs: list[str]):
+    """
+    Declare the renditions rendered for the images in a field, e.g.
+    ("catalog.OrganizationImage", "image", ["max-165x165"]).
+
+    The specs are written the way wagtail stores them: the filters of one
+    rendition joined with "|", e.g. "width-720|format-webp".
+    """
+    RENDITION_USAGES[usage] = (model, field, list(specs))
+
+
+def get_usage_specs(usage: str) -> list[str]:
+    return RENDITION_USAGES[usage][2]
+
+
+def get_usage_images(usage: str) -> dict[int, set[str]]:
+    """Return the ids of all images of a usage with its specs."""
+    model, field, specs = RENDITION_USAGES[usage]
+    image_ids = (
+        apps.get_model(model)
+        ._default_manager.filter(**{f"{field}__isnull": False})
+        .values_list(f"{field}_id", flat=True)
+        .distinct()
+    )
+    return {image_id: set(specs) for image_id in image_ids}
+
+
+def collect_images(usages: list[str]) -> dict[int, set[str]]:
+    """Return the ids of all images of the usages with the union of their specs."""
+    images: dict[int, set[str]] = {}
+    for usage in usages:
+        for image_id, specs in get_usage_images(usage).items():
+            images.setdefault(image_id, set()).update(specs)
+    return images
+
+
+def warm_renditions(images: dict[int, list[str]]) -> tuple[int, int, int]:
+    """
+    Generate the missing renditions of the images.
+
+    Returns the number of generated, already existing and failed renditions.
+    """
+    generated = existing = failed = 0
+    all_specs = {spec for specs in images.values() for spec in specs}
+
+    queryset = (
+        get_image_model()
+        .objects.filter(pk__in=images.keys())
+        .prefetch_renditions(*all_specs)
+    )
+    for image in queryset:
+        filters = [Filter(spec) for spec in images[image.pk]]
+        found = image.find_existing_renditions(*filters)
+        missing = [f for f in filters if f not in found]
+        existing += len(found)
+
+        for filter in missing:
+            # One broken file or unsupported format must not stop the batch.
+            try:
+                image.create_rendition(filter)
+            except Exception:
+                failed += 1
+            else:
+                generated += 1
+
+    return generated, existing, failed
+
+
+def enqueue_renditions(usage: str, image_ids: list[int]):
+    """Generate the renditions of a usage in the background after the commit."""
+    from core.tasks import warm_image_renditions
+
+    image_ids = [image_id for image_id in image_ids if image_id]
+    if image_ids:
+        transaction.on_commit(lambda: warm_image_renditions.enqueue(image_ids, usage))
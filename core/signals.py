@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from wagtail.models import Page
+from wagtail.signals import page_moved, page_published, page_unpublished
+
+from core.cache import bump_tree_versions
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def bump_tree_versions_after_publish(sender, instance, **kwargs):
+    bump_tree_versions(instance.path)
+
+
+@receiver(page_moved)
+def bump_tree_versions_after_move(sender, instance, parent_page_before, **kwargs):
+    bump_tree_versions(parent_page_before.path)
+    bump_tree_versions(instance.path)
+
+
+@receiver(post_delete)
+def bump_tree_versions_after_delete(sender, instance, **kwargs):
+    if isinstance(instance, Page):
+        bump_tree_versions(instance.path)
@@ -0,0 +1,10 @@
+from django_tasks import task
+
+from core.renditions import get_usage_specs, warm_renditions
+
+
+@task()
+def warm_image_renditions(image_ids: list[int], usage: str):
+    """Generate the missing renditions of newly attached images."""
+    specs = get_usage_specs(usage)
+    warm_renditions({image_id: specs for image_id in image_ids})
@@ -2,6 +2,7 @@ import random
 import re
 from datetime import time
 from functools import lru_cache
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 from django import template
 from django.conf import settings
@@ -10,6 +11,7 @@ from django.template.base import mark_safe
 from django.template.exceptions import TemplateDoesNotExist
 from slugify import slugify
 
+from catalog.geo import parse_ll
 from core.jsonld import render_jsonld
 from core.models import SiteSettings
 from core.utils import get_domain_name, truncate_string
@@ -98,8 +100,11 @@ def split(value: str, separator: str):
 @register.filter
 def coords(value: str):
     """Return a formatted coordinates."""
-    lon, lat = value.split(",")
-    return "%.5f,%.5f" % (float(lat), float(lon))
+    point = parse_ll(value)
+    if point is None:
+        return value
+    lat, lon = point
+    return "%.5f,%.5f" % (lon, lat)
 
 
 @register.filter
@@ -143,6 +148,32 @@ def set_page(value, page_number):
     return value
 
 
+def _replace_cursor(value, cursor=None):
+    url = urlsplit(value)
+    query = [
+        (key, item)
+        for key, item in parse_qsl(url.query, keep_blank_values=True)
+        if key not in ("page", "after")
+    ]
+    if cursor:
+        query.append(("after", cursor))
+    return urlunsplit(url._replace(query=urlencode(query)))
+
+
+@register.filter()
+def set_after(value, cursor):
+    """Sets 'after' cursor property to the pagination link"""
+
+    return _replace_cursor(value, cursor)
+
+
+@register.filter()
+def remove_after(value):
+    """Removes 'after' cursor property from the pagination link"""
+
+    return _replace_cursor(value)
+
+
 @register.filter()
 def remove_page(value):
     """Removes 'page' property from the pagination link"""
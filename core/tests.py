@@ -0,0 +1,59 @@
+from datetime import UTC, datetime
+
+from django.db.models import Q
+from django.test import SimpleTestCase
+
+from blog.models import BlogPostPage
+from catalog.models import Organization
+from catalog.services import ORGANIZATION_KEYS
+from core.utils import (
+    CURSOR_KEYS,
+    decode_cursor,
+    encode_cursor,
+    get_cursor,
+    keyset_filter,
+)
+
+
+class CursorTests(SimpleTestCase):
+    def test_organization_cursor_round_trip(self):
+        organization = Organization(pk=42, rank_key=123456789)
+        cursor = get_cursor(organization, ORGANIZATION_KEYS)
+
+        self.assertEqual(
+            decode_cursor(cursor, Organization, ORGANIZATION_KEYS), [123456789, 42]
+        )
+
+    def test_page_cursor_round_trip(self):
+        published = datetime(2025, 5, 1, 12, 30, tzinfo=UTC)
+        post = BlogPostPage(pk=7, first_published_at=published)
+        cursor = get_cursor(post, CURSOR_KEYS)
+
+        self.assertEqual(
+            decode_cursor(cursor, BlogPostPage, CURSOR_KEYS), [published, 7]
+        )
+
+    def test_invalid_cursor(self):
+        self.assertIsNone(
+            decode_cursor("not a cursor", Organization, ORGANIZATION_KEYS)
+        )
+        self.assertIsNone(
+            decode_cursor(encode_cursor(["x", 1]), Organization, ORGANIZATION_KEYS)
+        )
+        self.assertIsNone(
+            decode_cursor(encode_cursor([1, 2]), Organization, ("-missing", "-pk"))
+        )
+
+    def test_keyset_filter_null_key(self):
+        published = datetime(2025, 5, 1, 12, 30, tzinfo=UTC)
+
+        self.assertEqual(
+            keyset_filter(BlogPostPage, CURSOR_KEYS, [published, 7]),
+            Q(first_published_at__lt=published)
+            | Q(first_published_at__isnull=True)
+            | (Q(first_published_at=published) & Q(pk__lt=7)),
+        )
+        self.assertEqual(
+            keyset_filter(BlogPostPage, CURSOR_KEYS, [None, 7]),
+            Q(first_published_at__isnull=True) & Q(pk__lt=7),
+        )
@@ -1,6 +1,28 @@
+import base64
+import binascii
+import hashlib
+import json
 import math
 
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError
 from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+
+from core.cache import get_tree_version
+
+COUNT_CACHE_TIMEOUT = 60 * 60
+
+# Default sort keys of the keyset pagination, newest pages first.
+CURSOR_KEYS = ("-first_published_at", "-pk")
+
+# Offset pages from this deep on link their next page by cursor.
+CURSOR_PAGE_DEPTH = 10
+
+# Subtrees estimated bigger than this are not counted exactly in estimate mode.
+COUNT_ESTIMATE_THRESHOLD = 10_000
 
 
 def is_ajax(request):
@@ -66,10 +88,88 @@ def get_domain_name(url: str) -> str:
     return parsed_url.netloc or parsed_url.path.split("/")[0] if parsed_url.path else ""
 
 
-def paginate(request, queryset, count=16):
-    paginator = Paginator(queryset, count)
+def get_count_key(parent=None, *parts) -> str:
+    """
+    Return a count cache key for a listing under the parent page.
+
+    The key contains the version of the parent subtree, so it changes when
+    a page under the parent is published, unpublished, moved or deleted.
+    Other parts, e.g. the filters, are added to the key as they are.
+    """
+    path = parent.path if parent else ""
+    return ":".join([path, str(get_tree_version(path)), *map(str, parts)])
+
+
+def estimate_count(queryset) -> int | None:
+    """Return the planner row estimate of a queryset on PostgreSQL."""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def get_cached_count(queryset, count_key: str, estimate: bool = False) -> int:
+    """
+    Return the count of a queryset, cached under the count key.
+
+    With estimate, subtrees which the planner estimates bigger than
+    COUNT_ESTIMATE_THRESHOLD get the estimate instead of an exact count.
+    """
+    cache_key = "paginate-count:" + hashlib.md5(count_key.encode()).hexdigest()
+    count = cache.get(cache_key)
+    if count is not None:
+        return count
+
+    count = estimate_count(queryset) if estimate else None
+    if count is None or count < COUNT_ESTIMATE_THRESHOLD:
+        count = queryset.count()
+
+    cache.set(cache_key, count, COUNT_CACHE_TIMEOUT)
+    return count
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator which reads the object count from the count cache."""
+
+    def __init__(self, *args, count_key=None, estimate=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count_key = count_key
+        self.estimate = estimate
+
+    @cached_property
+    def count(self):
+        if not self.count_key:
+            return super().count
+        return get_cached_count(self.object_list, self.count_key, self.estimate)
+
+
+def paginate(request, queryset, count=16, count_key=None, estimate=False, keys=None):
+    """
+    Return the requested page of the queryset.
+
+    Pass a count_key, see get_count_key, to cache the count between pages.
+    With the sort keys of cursor_paginate, pages from CURSOR_PAGE_DEPTH on
+    get the next_cursor of their last row, so deep crawls continue in the
+    keyset mode instead of growing the OFFSET.
+    """
+    if keys:
+        queryset = queryset.order_by(*get_ordering(queryset.model, keys))
+    paginator = CachedCountPaginator(
+        queryset, count, count_key=count_key, estimate=estimate
+    )
     page_number = request.GET.get("page", 1)
     objects = paginator.get_page(page_number)
+    objects.next_cursor = None
+    if keys and objects.number >= CURSOR_PAGE_DEPTH and objects.has_next():
+        objects.next_cursor = get_cursor(objects[-1], keys)
     return objects
 
 
@@ -135,3 +235,149 @@ def starsort(ns):
 
     fsns = f(s, ns)
     return fsns - z * math.sqrt((f(s2, ns) - fsns**2) / (N + K + 1))
+
+
+class CursorPage:
+    """A page of a keyset paginated queryset, see cursor_paginate."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor=None, is_first=True, total=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.is_first = is_first
+        self.total = total
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self) -> bool:
+        return not self.is_first
+
+
+def encode_cursor(values: list) -> str:
+    """Encode the sort key values of a row into an opaque cursor."""
+    raw = json.dumps(values, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def get_cursor(obj, keys) -> str:
+    """Return the cursor of the rows after the object in the keys order."""
+    return encode_cursor([getattr(obj, key.lstrip("-")) for key in keys])
+
+
+def get_key_field(model, key: str):
+    name = key.lstrip("-")
+    # "pk" is an alias, not a field name.
+    return model._meta.pk if name == "pk" else model._meta.get_field(name)
+
+
+def decode_cursor(cursor: str, model, keys) -> list | None:
+    """Decode a cursor into the sort key values, None if it is invalid."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        return None
+
+    if not isinstance(values, list) or len(values) != len(keys):
+        return None
+
+    try:
+        return [
+            get_key_field(model, key).to_python(value)
+            for key, value in zip(keys, values)
+        ]
+    except (FieldDoesNotExist, ValidationError):
+        return None
+
+
+def get_ordering(model, keys) -> list:
+    """Return the order_by of the keys, NULLs last as keyset_filter expects."""
+    ordering = []
+    for key in keys:
+        if not get_key_field(model, key).null:
+            ordering.append(key)
+        elif key.startswith("-"):
+            ordering.append(F(key[1:]).desc(nulls_last=True))
+        else:
+            ordering.append(F(key).asc(nulls_last=True))
+    return ordering
+
+
+def keyset_filter(model, keys, values) -> Q:
+    """Return the condition of the rows after the values in the keys order."""
+    condition = Q()
+    equal = Q()
+    for key, value in zip(keys, values):
+        name = key.lstrip("-")
+        nullable = get_key_field(model, key).null
+        if value is not None:
+            lookup = "lt" if key.startswith("-") else "gt"
+            after = Q(**{f"{name}__{lookup}": value})
+            if nullable:
+                # NULLs sort after every value.
+                after |= Q(**{f"{name}__isnull": True})
+            condition |= equal & after
+            equal &= Q(**{name: value})
+        else:
+            # Only the next keys order the rows within the NULLs.
+            equal &= Q(**{f"{name}__isnull": True})
+    return condition
+
+
+def get_total(queryset, count_key=None) -> int:
+    if count_key:
+        return get_cached_count(queryset, count_key)
+    return queryset.count()
+
+
+def cursor_paginate(
+    request,
+    queryset,
+    count=16,
+    keys=CURSOR_KEYS,
+    total=False,
+    count_key=None,
+):
+    """
+    Paginate a queryset by its sort keys instead of OFFSET.
+
+    The page after an opaque ?after= cursor is one index range read however
+    deep it is. The last key must be unique, e.g. the primary key. The total
+    count is only computed if asked for, cached under the count_key if any.
+    """
+    keys = list(keys)
+    queryset = queryset.order_by(*get_ordering(queryset.model, keys))
+
+    cursor = request.GET.get("after")
+    values = decode_cursor(cursor, queryset.model, keys) if cursor else None
+
+    page_queryset = queryset
+    if values is not None:
+        page_queryset = queryset.filter(keyset_filter(queryset.model, keys, values))
+
+    objects = list(page_queryset[: count + 1])
+
+    next_cursor = None
+    if len(objects) > count:
+        objects = objects[:count]
+        next_cursor = get_cursor(objects[-1], keys)
+
+    return CursorPage(
+        objects,
+        next_cursor=next_cursor,
+        is_first=values is None,
+        total=get_total(queryset, count_key) if total else None,
+    )
@@ -1,4 +1,4 @@
-from core.utils import paginate
+from core.utils import CURSOR_KEYS, cursor_paginate, get_count_key, paginate
 from ratings.models import RatingCategoryPage, RatingPage, RatingsIndexPage
 
 
@@ -44,4 +44,7 @@ def get_paginated_ratings_posts_service(context, parent, count=16):
 
     qs = qs.filter(**filters)
 
-    return paginate(request, qs, count)
+    if "after" in request.GET:
+        return cursor_paginate(request, qs, count)
+    count_key = get_count_key(parent, "ratings", sorted(filters.items()))
+    return paginate(request, qs, count, count_key=count_key, keys=CURSOR_KEYS)